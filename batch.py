@@ -0,0 +1,254 @@
+"""Headless batch processing of image files
+
+Example:
+    python batch.py scans/ -o out/ --op "Dilasi" --param morph_kernel=5 --workers 8
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from export import TIFF_COMPRESSIONS, ExportOptions, describe_error, output_path, unique_path, write_image
+from loader import MAPPED_DECODING, ImageSource
+from mmap_io import MAPPED_EXTENSIONS, is_mappable, open_mapped, parse_raw_shape, run_mapped
+from parallel import DEFAULT_STRIP_ROWS, StripExecutor
+from operations import ANALYSIS_OPERATIONS, OPERATIONS
+from pipeline import Pipeline, PipelineStep
+from result_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache, run_cached
+from tiling import DEFAULT_TILE_SIZE, process_tiled
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+FileResult = namedtuple("FileResult", "path output bytes_in seconds error cached", defaults=(False,))
+
+
+def parse_value(text):
+    """Parse a --param value as int, float or string"""
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def load_spec(args):
+    """Build the pipeline to run from the command line
+
+    ``--spec`` accepts a single operation ``{"operation": ..., "params": {...}}``
+    or a saved pipeline ``{"steps": [...]}``; ``--param`` applies to single operations.
+    """
+    if args.spec:
+        with open(args.spec) as f:
+            spec = json.load(f)
+        if "steps" in spec:
+            if args.param:
+                raise ValueError("--param cannot be combined with a pipeline spec")
+            return Pipeline(PipelineStep.from_dict(step) for step in spec["steps"])
+        choice = spec["operation"]
+        params = spec.get("params", {})
+    else:
+        choice = args.op
+        params = {}
+
+    for item in args.param:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Parameter must be key=value: {item}")
+        params[key] = parse_value(value)
+
+    return Pipeline([PipelineStep(choice, params)])
+
+
+def collect_inputs(sources, extensions=IMAGE_EXTENSIONS):
+    """Expand directories, glob patterns and files into a sorted list of image paths"""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.lower().endswith(extensions):
+                    paths.append(os.path.join(source, name))
+        elif os.path.isfile(source):
+            paths.append(source)
+        else:
+            paths.extend(p for p in sorted(glob.glob(source)) if os.path.isfile(p))
+    return paths
+
+
+@lru_cache(maxsize=None)
+def strip_executor(threads, strip_rows):
+    """Strip executor shared by all files handled in this process"""
+    return StripExecutor(threads, strip_rows)
+
+
+@lru_cache(maxsize=None)
+def result_cache(directory, max_bytes):
+    """Result cache shared by all files handled in this process"""
+    return ResultCache(directory, max_bytes)
+
+
+def process_file(file_path, out_path, pipeline, fmt, tile_size=None, raw_shape=None, mapped=False,
+                 threads=1, strip_rows=DEFAULT_STRIP_ROWS, cache_dir=None,
+                 cache_bytes=DEFAULT_MAX_BYTES, options=ExportOptions()):
+    """Process one file into ``out_path``; errors are reported in the result instead of raised
+
+    With ``tile_size`` the file is processed band by band into a tiled TIFF.
+    With ``mapped`` uncompressed inputs are memory-mapped and, for npy/raw and
+    uncompressed tif outputs, written into a memory-mapped output file.
+    ``threads`` splits each in-memory image into strips of ``strip_rows`` rows
+    processed in parallel.
+    With ``cache_dir`` in-memory results are looked up in (and added to) the
+    on-disk result cache there, bounded to ``cache_bytes``.
+    ``options`` are the encoder settings of the written files.
+    """
+    start = time.perf_counter()
+    executor = strip_executor(threads, strip_rows)
+    hit = False
+    try:
+        cache = result_cache(cache_dir, cache_bytes) if cache_dir else None
+        bytes_in = os.path.getsize(file_path)
+        is_raw = file_path.lower().endswith(".raw")
+        if tile_size:
+            process_tiled(file_path, out_path, pipeline, tile_size)
+        elif mapped and (is_raw or is_mappable(file_path)):
+            uncompressed_tiff = fmt.lower() in ("tif", "tiff") and options.tiff_compression == "none"
+            if uncompressed_tiff or fmt.lower() in ("npy", "raw"):
+                run_mapped(pipeline, file_path, out_path, raw_shape, executor)
+            else:
+                decoding = dict(MAPPED_DECODING, raw_shape=raw_shape) if is_raw else MAPPED_DECODING
+                processed, hit = run_cached(
+                    cache, file_path, pipeline,
+                    lambda: executor.run(pipeline, open_mapped(file_path, raw_shape).bgr()), decoding)
+                write_image(out_path, processed, options)
+        else:
+            source = ImageSource(file_path)
+            processed, hit = run_cached(cache, file_path, pipeline,
+                                        lambda: executor.run(pipeline, source.full()), source.decoding)
+            write_image(out_path, processed, options)
+        return FileResult(file_path, out_path, bytes_in, time.perf_counter() - start, None, hit)
+    except Exception as e:
+        return FileResult(file_path, None, 0, time.perf_counter() - start, describe_error(e))
+
+
+def run_batch(paths, out_dir, pipeline, fmt="png", workers=None, report=print, tile_size=None,
+              raw_shape=None, mapped=False, threads=1, strip_rows=DEFAULT_STRIP_ROWS,
+              cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES, options=ExportOptions()):
+    """Process files on a process pool and return the list of results
+
+    Inputs whose output names collide (same file name in other folders or
+    formats) get numbered outputs, so no worker overwrites another's result.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    taken = set()
+    out_paths = [unique_path(output_path(path, out_dir, pipeline, "tif" if tile_size else fmt), taken)
+                 for path in paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_file, path, out_path, pipeline, fmt, tile_size,
+                                   raw_shape, mapped, threads, strip_rows, cache_dir, cache_bytes,
+                                   options)
+                   for path, out_path in zip(paths, out_paths)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if report:
+                if result.error is not None:
+                    report(f"FAILED {result.path}: {result.error}")
+                else:
+                    cached = ", cached" if result.cached else ""
+                    report(f"ok     {result.path} -> {result.output} ({result.seconds:.2f}s{cached})")
+    return results
+
+
+def summarize(results, elapsed):
+    """Format the throughput summary of a batch run"""
+    done = [r for r in results if r.error is None]
+    failed = len(results) - len(done)
+    cached = sum(1 for r in done if r.cached)
+    megabytes = sum(r.bytes_in for r in done) / (1024 * 1024)
+    elapsed = max(elapsed, 1e-9)
+    return (f"{len(done)} processed ({cached} from cache), {failed} failed in {elapsed:.2f}s - "
+            f"{len(done) / elapsed:.2f} images/s, {megabytes / elapsed:.2f} MB/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch process images without the GUI")
+    parser.add_argument("inputs", nargs="+", help="image files, directories or glob patterns")
+    parser.add_argument("-o", "--output", required=True, help="output directory")
+    parser.add_argument("--op", choices=[op for op in OPERATIONS if op not in ANALYSIS_OPERATIONS],
+                        default=OPERATIONS[0], help="operation to apply")
+    parser.add_argument("--param", action="append", default=[], metavar="KEY=VALUE",
+                        help="operation parameter, e.g. threshold=100 (repeatable)")
+    parser.add_argument("--spec", help="JSON file with {\"operation\": ..., \"params\": {...}} "
+                                       "or a pipeline saved from the GUI")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="threads per image, splitting it into strips (useful with few large images)")
+    parser.add_argument("--strip-rows", type=int, default=DEFAULT_STRIP_ROWS,
+                        help="rows per strip for --threads")
+    parser.add_argument("--format", default="png", help="output file extension")
+    defaults = ExportOptions()
+    parser.add_argument("--png-compression", type=int, choices=range(10),
+                        default=defaults.png_compress_level, metavar="0-9",
+                        help="PNG compression level, 0 fastest to 9 smallest")
+    parser.add_argument("--tiff-compression", choices=TIFF_COMPRESSIONS,
+                        default=defaults.tiff_compression, help="compression of TIFF outputs")
+    parser.add_argument("--jpeg-quality", type=int, default=defaults.jpeg_quality,
+                        help="JPEG quality, 1-100")
+    parser.add_argument("--jpeg-optimize", action="store_true",
+                        help="optimize JPEG Huffman tables (smaller files, slower encoding)")
+    parser.add_argument("--tiled", action="store_true",
+                        help="stream each image in bands and write a tiled TIFF (for images larger than RAM)")
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE,
+                        help="tile edge and band height in pixels for --tiled (multiple of 16)")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map uncompressed TIFF, .npy and .raw inputs and tif/npy/raw outputs")
+    parser.add_argument("--raw-shape", metavar="WxH[xC]",
+                        help="image shape of .raw sensor dumps, e.g. 4000x3000 or 4000x3000x3")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse results of identical files and settings from the on-disk result cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="result cache directory for --cache (shared with the GUI by default)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        metavar="MB", help="result cache size limit in MB for --cache")
+    args = parser.parse_args(argv)
+
+    try:
+        pipeline = load_spec(args)
+        raw_shape = parse_raw_shape(args.raw_shape) if args.raw_shape else None
+        if args.threads < 1 or args.strip_rows < 1:
+            raise ValueError("--threads and --strip-rows must be at least 1")
+        if not 1 <= args.jpeg_quality <= 100:
+            raise ValueError("--jpeg-quality must be between 1 and 100")
+        if args.cache_size < 1:
+            raise ValueError("--cache-size must be at least 1 MB")
+    except (ValueError, KeyError, OSError) as e:
+        parser.error(str(e))
+
+    extensions = IMAGE_EXTENSIONS + MAPPED_EXTENSIONS if args.mmap else IMAGE_EXTENSIONS
+    paths = collect_inputs(args.inputs, extensions)
+    if not paths:
+        parser.error("no input images found")
+
+    start = time.perf_counter()
+    tile_size = args.tile_size if args.tiled else None
+    results = run_batch(paths, args.output, pipeline, args.format, args.workers,
+                        tile_size=tile_size, raw_shape=raw_shape, mapped=args.mmap,
+                        threads=args.threads, strip_rows=args.strip_rows,
+                        cache_dir=args.cache_dir if args.cache else None,
+                        cache_bytes=args.cache_size * 1024 * 1024,
+                        options=ExportOptions(args.png_compression, args.tiff_compression,
+                                              args.jpeg_quality, args.jpeg_optimize))
+    print(summarize(results, time.perf_counter() - start))
+    return 1 if any(r.error is not None for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
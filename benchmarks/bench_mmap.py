@@ -0,0 +1,122 @@
+"""Compare load + process + save through PIL against the memory-mapped path
+
+Each measurement runs in a fresh subprocess so its peak RSS is isolated.
+Note that peak RSS includes file-backed pages touched through the map.
+
+Usage:
+    python benchmarks/bench_mmap.py --megapixels 25 --op Dilasi --json mmap.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from mmap_io import run_mapped, tifffile
+from pipeline import Pipeline, PipelineStep
+from operations import ANALYSIS_OPERATIONS, OPERATIONS
+from processing import pil_to_bgr, to_pil
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def make_input(path, megapixels, color):
+    """Write a synthetic uncompressed TIFF of roughly ``megapixels``"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    shape = (height, width, 3) if color else (height, width)
+    rng = np.random.default_rng(0)
+    tifffile.imwrite(path, rng.integers(0, 256, shape, dtype=np.uint8))
+    return shape
+
+
+def run_pil(in_path, out_path, pipeline):
+    """Current GUI path: PIL decode, NumPy copy, process, PIL encode"""
+    with Image.open(in_path) as img:
+        cv_img = pil_to_bgr(img)
+    to_pil(pipeline.run(cv_img)).save(out_path)
+
+
+def run_child(mode, in_path, out_path, spec):
+    pipeline = Pipeline.from_json(spec)
+    start = time.perf_counter()
+    if mode == "pil":
+        run_pil(in_path, out_path, pipeline)
+    else:
+        run_mapped(pipeline, in_path, out_path)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_rss_mb()}))
+
+
+def measure(mode, in_path, out_path, pipeline, repeat):
+    """Best time and peak RSS of ``repeat`` subprocess runs"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, in_path, out_path,
+             pipeline.to_json()],
+            check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["seconds"])
+    return {"mode": mode, "seconds": best["seconds"],
+            "peak_rss_mb": max((r["peak_rss_mb"] or 0) for r in runs) or None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--child", nargs=4, metavar=("MODE", "IN", "OUT", "SPEC"), help=argparse.SUPPRESS)
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[4, 25])
+    parser.add_argument("--op", choices=[op for op in OPERATIONS if op not in ANALYSIS_OPERATIONS],
+                        default="Dilasi")
+    parser.add_argument("--gray", action="store_true", help="benchmark a gray input")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(*args.child)
+        return 0
+    if tifffile is None:
+        parser.error("the benchmark needs the tifffile package")
+
+    pipeline = Pipeline([PipelineStep(args.op)])
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for megapixels in args.megapixels:
+            in_path = os.path.join(tmp, "input.tif")
+            shape = make_input(in_path, megapixels, not args.gray)
+            for mode in ("pil", "mmap"):
+                result = measure(mode, in_path, os.path.join(tmp, f"out_{mode}.tif"),
+                                 pipeline, args.repeat)
+                result.update(megapixels=megapixels, shape=list(shape), operation=args.op)
+                results.append(result)
+                rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] else "n/a"
+                print(f"{megapixels:>6.1f} MP  {mode:<5} {result['seconds']:8.3f}s  peak RSS {rss}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
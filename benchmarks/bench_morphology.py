@@ -0,0 +1,75 @@
+"""Compare the morphology engine against plain OpenCV 2D-kernel morphology
+
+The baseline is what Dilasi used to do: ``cv2.morphologyEx`` with a full
+``k x k`` structuring element and ``iterations`` passes. Every case also
+checks that both give identical results.
+
+Usage:
+    python benchmarks/bench_morphology.py --megapixels 16 --json morph.json
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from bench_operations import make_image, metadata, time_case
+from morphology import MORPH_OPERATIONS, SHAPES, effective_size, morphology, reference_morphology
+
+KERNELS = [3, 15, 31]
+ITERATIONS = [1, 10]
+
+
+def run(megapixels, repeat, operations, shapes, kernels=KERNELS, iterations_list=ITERATIONS, report=print):
+    gray = make_image(megapixels, color=False)
+    results = []
+    for operation, shape, kernel, iterations in itertools.product(operations, shapes, kernels, iterations_list):
+        engine = lambda: morphology(gray, operation, kernel, iterations, shape)
+        baseline = lambda: reference_morphology(gray, operation, kernel, iterations, shape)
+        if not np.array_equal(engine(), baseline()):
+            raise AssertionError(f"{operation} {shape} k{kernel} i{iterations} differs from OpenCV")
+
+        base_best, _ = time_case(baseline, repeat)
+        best, _ = time_case(engine, repeat)
+        result = {
+            "operation": operation,
+            "shape": shape,
+            "kernel": kernel,
+            "iterations": iterations,
+            "effective_size": effective_size(kernel, iterations) if shape == "Rect" else None,
+            "megapixels": megapixels,
+            "baseline_s": base_best,
+            "engine_s": best,
+            "speedup": base_best / best if best else None,
+        }
+        results.append(result)
+        if report:
+            report(f"{operation:<8} {shape:<8} k{kernel:<3} i{iterations:<3} "
+                   f"{base_best * 1000:9.2f} -> {best * 1000:9.2f} ms  x{result['speedup']:5.2f}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the morphology engine")
+    parser.add_argument("--megapixels", type=float, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--op", choices=MORPH_OPERATIONS, nargs="+", default=list(MORPH_OPERATIONS))
+    parser.add_argument("--shape", choices=SHAPES, nargs="+", default=list(SHAPES))
+    parser.add_argument("--kernels", type=int, nargs="+", default=KERNELS)
+    parser.add_argument("--iterations", type=int, nargs="+", default=ITERATIONS)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.megapixels, args.repeat, args.op, args.shape, args.kernels, args.iterations)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""Benchmark every image operation across image sizes and parameter regimes
+
+Synthetic gray and color images are generated once per size. Each case is
+timed (best and median of ``--repeat`` runs) and then run once more under
+tracemalloc to record the peak of NumPy/OpenCV output allocations (OpenCV's
+internal temporaries are not visible to tracemalloc).
+
+Usage:
+    python benchmarks/bench_operations.py --sizes 1 4 16 --json results.json
+    python benchmarks/bench_operations.py --compare base.json results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from histogram import compute_histogram
+from PIL import Image
+
+from display import ImagePyramid
+from pipeline import Pipeline, PipelineStep
+from processing import apply_operation, pil_to_bgr, to_gray, to_pil
+
+DEFAULT_SIZES = [1, 4, 16]
+ALL_SIZES = [1, 4, 16, 64, 100]
+CANVAS_SIZE = (500, 400)
+
+# Point operations that the pipeline fuses into one table lookup
+POINT_CHAIN = [
+    ("Brightness/Contrast", {"brightness": 40, "contrast": 1.5}),
+    ("Gamma", {"gamma": 2.2}),
+    ("Curves", {"curve_midtones": 150}),
+    ("Biner (Threshold)", {"threshold": 128}),
+]
+
+# (case name, operation, params); None as operation marks a non-operation stage
+OPERATION_CASES = [
+    ("grayscale", "Grayscale", {}),
+    ("threshold", "Biner (Threshold)", {"threshold": 128}),
+    ("brightness_contrast", "Brightness/Contrast", {"brightness": 40, "contrast": 1.5}),
+    ("gamma", "Gamma", {"gamma": 2.2}),
+    ("levels", "Levels", {"levels_black": 16, "levels_white": 235, "levels_gamma": 1.2}),
+    ("curves", "Curves", {"curve_shadows": 48, "curve_highlights": 210}),
+    ("logic_and", "Operasi Logika", {"logic_op": "AND"}),
+    ("logic_or", "Operasi Logika", {"logic_op": "OR"}),
+    ("logic_xor", "Operasi Logika", {"logic_op": "XOR"}),
+    ("logic_not", "Operasi Logika", {"logic_op": "NOT"}),
+    ("dilate_k3_i1", "Dilasi", {"morph_kernel": 3, "morph_iter": 1}),
+    ("dilate_k3_i10", "Dilasi", {"morph_kernel": 3, "morph_iter": 10}),
+    ("dilate_k15_i1", "Dilasi", {"morph_kernel": 15, "morph_iter": 1}),
+    ("dilate_k15_i10", "Dilasi", {"morph_kernel": 15, "morph_iter": 10}),
+    ("dilate_ellipse_k15", "Dilasi", {"morph_kernel": 15, "morph_shape": "Ellipse"}),
+    ("erode_k15_i10", "Erosi", {"morph_kernel": 15, "morph_iter": 10}),
+    ("opening_k15_i1", "Opening", {"morph_kernel": 15, "morph_iter": 1}),
+    ("closing_k15_i1", "Closing", {"morph_kernel": 15, "morph_iter": 1}),
+    ("canny", "Edge Detection", {"edge_method": "Canny"}),
+    ("sobel", "Edge Detection", {"edge_method": "Sobel"}),
+    ("sobel_l1", "Edge Detection", {"edge_method": "Sobel", "edge_magnitude": "L1"}),
+    ("sobel_normalize", "Edge Detection", {"edge_method": "Sobel", "edge_output": "Normalize"}),
+    ("scharr", "Edge Detection", {"edge_method": "Scharr"}),
+    ("laplacian", "Edge Detection", {"edge_method": "Laplacian"}),
+]
+
+
+def make_image(megapixels, color, seed=0):
+    """Synthetic 4:3 image with smooth structure and noise (not pure noise)"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (max(height // 16, 1), max(width // 16, 1), 3), dtype=np.uint8)
+    img = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    img = cv2.add(img, rng.integers(0, 32, img.shape, dtype=np.uint8))
+    return img if color else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def stage_cases(cv_img):
+    """Benchmark cases for one input image: (name, operation, params, callable)"""
+    # Operations start from the image itself, so color cases include the gray conversion
+    cases = []
+    for name, operation, params in OPERATION_CASES:
+        cases.append((name, operation, params,
+                      lambda operation=operation, params=params: apply_operation(cv_img, operation, params)))
+
+    # The CV_64F Sobel the edge engine replaced, as a time and memory baseline
+    cases.append(("sobel_cv64f_legacy", None, {}, lambda: legacy_sobel(to_gray(cv_img))))
+
+    chain = Pipeline([PipelineStep(operation, params) for operation, params in POINT_CHAIN])
+    cases += [
+        ("point_chain_fused", None, {}, lambda: chain.run(cv_img)),
+        ("point_chain_unfused", None, {}, lambda: run_unfused(cv_img, POINT_CHAIN)),
+    ]
+
+    pil_img = to_pil(cv_img)
+    cases += [
+        ("to_gray", None, {}, lambda: to_gray(cv_img)),
+        ("histogram", "Histogram", {}, lambda: compute_histogram(cv_img)),
+        ("histogram_strided", "Histogram", {"max_samples": 250_000},
+         lambda: compute_histogram(cv_img, max_samples=250_000)),
+        ("pil_to_bgr", None, {}, lambda: pil_to_bgr(pil_img)),
+        ("to_pil", None, {}, lambda: to_pil(cv_img)),
+        # Full-resolution resample the canvases used before the display pyramid
+        ("display_lanczos", None, {}, lambda: fit_lanczos(pil_img, CANVAS_SIZE)),
+        ("pyramid_build", None, {}, lambda: ImagePyramid(cv_img)),
+    ]
+    pyramid = ImagePyramid(cv_img)
+    cases += [
+        ("pyramid_render_fit", None, {}, lambda: pyramid.render(CANVAS_SIZE)),
+        ("pyramid_render_zoom4", None, {}, lambda: pyramid.render(CANVAS_SIZE, 4.0, (0.3, 0.6))),
+    ]
+    photo = photo_case(pil_img)
+    if photo:
+        cases.append(photo)
+    return cases
+
+
+def legacy_sobel(gray):
+    sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+    return np.uint8(cv2.magnitude(sobelx, sobely))
+
+
+def run_unfused(cv_img, steps):
+    """Apply operations one call at a time, one pass over the image each"""
+    for operation, params in steps:
+        cv_img = apply_operation(cv_img, operation, params)
+    return cv_img
+
+
+def fit_lanczos(pil_img, size):
+    scale = min(size[0] / pil_img.width, size[1] / pil_img.height)
+    return pil_img.resize((max(int(pil_img.width * scale), 1), max(int(pil_img.height * scale), 1)),
+                          Image.LANCZOS)
+
+
+_tk_root = []
+
+
+def photo_case(pil_img):
+    """PhotoImage creation of a canvas-sized image, when a display is available"""
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        if not _tk_root:
+            _tk_root.append(tk.Tk())
+            _tk_root[0].withdraw()
+        root = _tk_root[0]
+    except Exception:
+        return None
+    display_img = fit_lanczos(pil_img, CANVAS_SIZE)
+    return ("display_photoimage", None, {}, lambda: ImageTk.PhotoImage(display_img, master=root))
+
+
+def time_case(func, repeat):
+    """Best and median wall time of ``repeat`` runs after one warm-up"""
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def peak_memory(func):
+    """Peak traced allocation in bytes of one run"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "opencv_threads": cv2.getNumThreads(),
+    }
+
+
+def run(sizes, repeat, name_filter=None, colors=(False, True), report=print):
+    results = []
+    for megapixels in sizes:
+        for color in colors:
+            cv_img = make_image(megapixels, color)
+            for name, operation, params, func in stage_cases(cv_img):
+                if name_filter and name_filter not in name:
+                    continue
+                best, median = time_case(func, repeat)
+                peak = peak_memory(func)
+                result = {
+                    "name": name,
+                    "operation": operation,
+                    "params": params,
+                    "megapixels": megapixels,
+                    "color": color,
+                    "best_s": best,
+                    "median_s": median,
+                    "mpix_per_s": megapixels / best if best else None,
+                    "peak_mb": peak / (1024 * 1024),
+                }
+                results.append(result)
+                if report:
+                    report(f"{megapixels:>5} MP {'color' if color else 'gray ':<5} {name:<22} "
+                           f"{best * 1000:9.2f} ms  {result['mpix_per_s']:9.1f} MP/s  "
+                           f"{result['peak_mb']:8.1f} MB")
+    return results
+
+
+def case_key(result):
+    return result["name"], result["megapixels"], result["color"]
+
+
+def compare(base_path, new_path, threshold):
+    """Print time ratios between two result files; return the number of regressions"""
+    with open(base_path) as f:
+        base = {case_key(r): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+
+    regressions = 0
+    for result in new:
+        old = base.get(case_key(result))
+        if old is None:
+            continue
+        ratio = result["best_s"] / old["best_s"] if old["best_s"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        print(f"{result['megapixels']:>5} MP {'color' if result['color'] else 'gray ':<5} "
+              f"{result['name']:<22} {old['best_s'] * 1000:9.2f} -> {result['best_s'] * 1000:9.2f} ms "
+              f"x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the image operations")
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES,
+                        help=f"image sizes in megapixels (full range: {ALL_SIZES})")
+    parser.add_argument("--all-sizes", action="store_true", help="use sizes " + str(ALL_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--gray-only", action="store_true")
+    parser.add_argument("--color-only", action="store_true")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="time ratio reported as a regression by --compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+
+    colors = (False,) if args.gray_only else (True,) if args.color_only else (False, True)
+    sizes = ALL_SIZES if args.all_sizes else args.sizes
+    results = run(sizes, args.repeat, args.filter, colors)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Scaling of strip-parallel execution across thread counts
+
+Each operation is timed on one large image with 1, 2, 4, ... threads up to
+``--max-threads`` (default: CPU count); speedups are relative to a plain
+single-call run (which is also what one thread does).
+OpenCV's own thread pool is limited to ``--cv-threads`` (default 1) so the
+numbers show the strip executor's scaling rather than OpenCV's.
+
+Usage:
+    python benchmarks/bench_parallel.py --megapixels 64 --json parallel.json
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+from bench_operations import make_image, metadata, time_case
+from parallel import DEFAULT_STRIP_ROWS, StripExecutor
+from pipeline import Pipeline, PipelineStep
+
+CASES = [
+    ("threshold", "Biner (Threshold)", {"threshold": 128}),
+    ("brightness_contrast", "Brightness/Contrast", {"brightness": 40, "contrast": 1.5}),
+    ("logic_xor", "Operasi Logika", {"logic_op": "XOR"}),
+    ("dilate_k15_i1", "Dilasi", {"morph_kernel": 15, "morph_iter": 1}),
+    ("sobel", "Edge Detection", {"edge_method": "Sobel"}),
+]
+
+
+def thread_counts(max_threads):
+    counts = []
+    n = 1
+    while n < max_threads:
+        counts.append(n)
+        n *= 2
+    return counts + [max_threads]
+
+
+def run(megapixels, repeat, max_threads, strip_rows, color=True, report=print):
+    cv_img = make_image(megapixels, color)
+    results = []
+    for name, operation, params in CASES:
+        pipeline = Pipeline([PipelineStep(operation, params)])
+        single, _ = time_case(lambda: pipeline.run(cv_img), repeat)
+        if report:
+            report(f"{name:<20} single call {single * 1000:9.2f} ms")
+        for threads in thread_counts(max_threads):
+            executor = StripExecutor(threads, strip_rows)
+            best, median = time_case(lambda: executor.run(pipeline, cv_img), repeat)
+            executor.shutdown()
+            result = {
+                "name": name,
+                "operation": operation,
+                "params": params,
+                "megapixels": megapixels,
+                "threads": threads,
+                "strip_rows": strip_rows,
+                "single_call_s": single,
+                "best_s": best,
+                "median_s": median,
+                "speedup": single / best if best else None,
+            }
+            results.append(result)
+            if report:
+                report(f"{name:<20} {threads:>3} threads {best * 1000:9.2f} ms  x{result['speedup']:5.2f}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark strip-parallel scaling")
+    parser.add_argument("--megapixels", type=float, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--strip-rows", type=int, default=DEFAULT_STRIP_ROWS)
+    parser.add_argument("--cv-threads", type=int, default=1,
+                        help="OpenCV internal threads during the benchmark")
+    parser.add_argument("--gray", action="store_true", help="use a gray input image")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    cv2.setNumThreads(args.cv_threads)
+    results = run(args.megapixels, args.repeat, args.max_threads, args.strip_rows, not args.gray)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
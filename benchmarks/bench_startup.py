@@ -0,0 +1,95 @@
+"""Time from launching the GUI to its first drawn window
+
+Each run is a fresh interpreter, so nothing is already imported or cached in
+memory by an earlier run. ``lazy`` is the GUI as shipped; ``eager`` imports
+OpenCV, matplotlib and the engine modules up front, as the GUI used to.
+Without a display only the import times are measured.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 5 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("cv2", "matplotlib")
+
+
+def run_child(mode):
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    if mode == "eager":
+        import export, histogram_window, parallel, processing, tiling  # noqa: F401
+    import tkinter as tk
+    import tugas
+    imported = time.perf_counter() - start
+
+    window = None
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        root = None
+    if root is not None:
+        app = tugas.ImageProcessorApp(root)
+        # Process the pending map and draw events of the first frame
+        root.update()
+        window = time.perf_counter() - start
+        app.on_close()
+
+    print(json.dumps({"import_s": imported, "window_s": window,
+                      "loaded": [name for name in HEAVY_MODULES if name in sys.modules]}))
+
+
+def measure(mode, repeat):
+    """Median times of ``repeat`` subprocess runs, including interpreter startup"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode],
+                                check=True, capture_output=True, text=True).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        run["process_s"] = time.perf_counter() - start
+        runs.append(run)
+    windows = [r["window_s"] for r in runs if r["window_s"] is not None]
+    return {"mode": mode,
+            "import_s": statistics.median(r["import_s"] for r in runs),
+            "window_s": statistics.median(windows) if windows else None,
+            "process_s": statistics.median(r["process_s"] for r in runs),
+            "loaded": runs[-1]["loaded"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--child", choices=("lazy", "eager"), help=argparse.SUPPRESS)
+    parser.add_argument("--modes", nargs="+", choices=("lazy", "eager"), default=["lazy", "eager"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child)
+        return 0
+
+    results = []
+    for mode in args.modes:
+        result = measure(mode, args.repeat)
+        results.append(result)
+        window = f"{result['window_s'] * 1000:7.0f} ms" if result["window_s"] is not None else "no display"
+        print(f"{mode:<6} import {result['import_s'] * 1000:7.0f} ms  first window {window}  "
+              f"whole run {result['process_s'] * 1000:7.0f} ms  "
+              f"loaded: {', '.join(result['loaded']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Memory-bounded cache of data derived from a source image
+
+Entries are keyed by ``(source_key, name)`` where ``source_key`` identifies the
+loaded image (the GUI uses its image version counter) and ``name`` the derived
+item, e.g. ``"bgr"``, ``"gray"`` or ``("proxy", (500, 400))``. Items are built
+lazily on first use and evicted least-recently-used once the byte budget is
+exceeded.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def estimate_nbytes(value):
+    """Approximate memory held by a cached value"""
+    if isinstance(value, np.memmap):
+        # File-backed pages can be reclaimed by the OS at any time
+        return 64
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if hasattr(value, "nbytes"):
+        # Containers of arrays such as display pyramids
+        return value.nbytes
+    return 64
+
+
+class DerivedCache:
+    """LRU cache of derived image data bounded by total size in bytes"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Jobs on worker threads read and fill the cache concurrently
+        self.lock = threading.Lock()
+
+    def get(self, source_key, name, build):
+        """Return a cached item, calling ``build()`` to create it on a miss"""
+        key = (source_key, name)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+
+        # Build outside the lock so other items stay available meanwhile
+        value = build()
+        self.put(source_key, name, value)
+        return value
+
+    def put(self, source_key, name, value):
+        """Store an item, evicting least recently used ones over budget"""
+        key = (source_key, name)
+        size = estimate_nbytes(value)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def values(self):
+        """Snapshot of the cached items, least recently used first"""
+        with self.lock:
+            return [value for value, _ in self.entries.values()]
+
+    def invalidate(self, source_key):
+        """Drop every item derived from a source image"""
+        with self.lock:
+            for key in [k for k in self.entries if k[0] == source_key]:
+                self.total_bytes -= self.entries.pop(key)[1]
+
+    def clear(self):
+        """Drop every cached item"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
@@ -0,0 +1,97 @@
+"""Multi-resolution display of images on the canvases
+
+An ``ImagePyramid`` keeps an image and successive half-size levels (mipmaps).
+Rendering a view picks the smallest level that is still at least as detailed
+as the screen needs, crops the visible region from it and finishes with one
+cheap resample of a canvas-sized area, so redraws, zooming, panning and
+window resizes never resample the full-resolution image.
+"""
+import cv2
+from PIL import Image
+
+MIN_LEVEL_SIZE = 128
+
+
+class ImagePyramid:
+    """Mipmap levels of a BGR (or gray) image"""
+
+    def __init__(self, array, order="bgr", min_size=MIN_LEVEL_SIZE, shared_base=False):
+        self.order = order
+        # A base array also cached on its own (as "bgr") is not counted twice
+        self.shared_base = shared_base
+        self.levels = [array]
+        while max(self.levels[-1].shape[:2]) > min_size:
+            prev = self.levels[-1]
+            size = (max(prev.shape[1] // 2, 1), max(prev.shape[0] // 2, 1))
+            # INTER_AREA at exactly half size is a 2x2 box average
+            self.levels.append(cv2.resize(prev, size, interpolation=cv2.INTER_AREA))
+
+    @property
+    def nbytes(self):
+        levels = self.levels[1:] if self.shared_base else self.levels
+        return sum(level.nbytes for level in levels)
+
+    @property
+    def width(self):
+        return self.levels[0].shape[1]
+
+    @property
+    def height(self):
+        return self.levels[0].shape[0]
+
+    def fit_scale(self, view_size):
+        """Scale at which the whole image fits ``view_size``"""
+        return min(view_size[0] / self.width, view_size[1] / self.height)
+
+    def level_for(self, scale):
+        """Index of the smallest level with at least ``scale`` of the full resolution"""
+        index = 0
+        for i, level in enumerate(self.levels):
+            if level.shape[1] / self.width >= scale:
+                index = i
+            else:
+                break
+        return index
+
+    def fit(self, view_size):
+        """The whole image resized to fit ``view_size``, as an array in the pyramid's order"""
+        scale = self.fit_scale(view_size)
+        level = self.levels[self.level_for(scale)]
+        size = (max(int(self.width * scale), 1), max(int(self.height * scale), 1))
+        return cv2.resize(level, size, interpolation=cv2.INTER_AREA)
+
+    def render(self, view_size, zoom=1.0, center=(0.5, 0.5)):
+        """Render the visible part of the image for a view
+
+        ``zoom`` is relative to fitting the whole image and ``center`` is the
+        image point at the middle of the view, in 0..1 image coordinates.
+        Returns the PIL image and the view position of its top-left corner.
+        """
+        view_width, view_height = view_size
+        scale = self.fit_scale(view_size) * zoom
+        center_x, center_y = center[0] * self.width, center[1] * self.height
+
+        # Visible region in full-resolution pixels
+        x0 = max(center_x - view_width / (2 * scale), 0)
+        y0 = max(center_y - view_height / (2 * scale), 0)
+        x1 = min(center_x + view_width / (2 * scale), self.width)
+        y1 = min(center_y + view_height / (2 * scale), self.height)
+
+        index = self.level_for(scale)
+        level = self.levels[index]
+        ratio = level.shape[1] / self.width
+        crop = level[int(y0 * ratio):max(int(round(y1 * ratio)), int(y0 * ratio) + 1),
+                     int(x0 * ratio):max(int(round(x1 * ratio)), int(x0 * ratio) + 1)]
+
+        out_size = (max(int(round((x1 - x0) * scale)), 1), max(int(round((y1 - y0) * scale)), 1))
+        interpolation = cv2.INTER_AREA if out_size[0] < crop.shape[1] else cv2.INTER_LINEAR
+        if zoom > 1 and scale / ratio >= 4:
+            # Well past 1:1 show the actual pixels
+            interpolation = cv2.INTER_NEAREST
+        view = cv2.resize(crop, out_size, interpolation=interpolation)
+
+        if view.ndim == 3 and self.order == "bgr":
+            view = cv2.cvtColor(view, cv2.COLOR_BGR2RGB)
+        position = (view_width / 2 + (x0 - center_x) * scale,
+                    view_height / 2 + (y0 - center_y) * scale)
+        return Image.fromarray(view), position
@@ -0,0 +1,101 @@
+"""Edge detection with compact intermediates
+
+Gradients are computed as ``CV_16S`` (2 bytes per pixel each) instead of
+``CV_64F``, and the magnitude is formed band by band so the float32 work
+arrays never exceed ``EDGE_BAND_ROWS`` rows; only the 8-bit result (plus a
+16-bit magnitude plane for normalized output) covers the whole image.
+
+Results above 255 are either saturated or the whole magnitude range is
+normalized to 0..255. Gradients use ``BORDER_REPLICATE`` like Canny's own
+Sobel pass.
+"""
+import cv2
+import numpy as np
+
+from operations import EDGE_MAGNITUDES, EDGE_OUTPUTS
+
+EDGE_BAND_ROWS = 512
+
+# Canny computes its 3x3 Sobel gradients with this border
+_BORDER = cv2.BORDER_REPLICATE
+
+
+def compute_gradients(gray, method="Sobel"):
+    """``(dx, dy)``: 3x3 Sobel (also used by Canny) or Scharr derivatives of ``gray``"""
+    if method in ("Sobel", "Canny"):
+        dx = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3, borderType=_BORDER)
+        dy = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3, borderType=_BORDER)
+        return dx, dy
+    if method == "Scharr":
+        dx = cv2.Scharr(gray, cv2.CV_16S, 1, 0, borderType=_BORDER)
+        dy = cv2.Scharr(gray, cv2.CV_16S, 0, 1, borderType=_BORDER)
+        return dx, dy
+    raise ValueError(f"No gradients for edge method: {method}")
+
+
+def _band_magnitude(dx, dy, l1):
+    """Magnitude of a band of gradients as float32 (L2) or int16 (L1)"""
+    if l1:
+        # |dx| + |dy| of 3x3 Sobel or Scharr fits in int16
+        return cv2.add(cv2.absdiff(dx, 0), cv2.absdiff(dy, 0), dtype=cv2.CV_16S)
+    return cv2.magnitude(dx.astype(np.float32), dy.astype(np.float32))
+
+
+def _band_response(gray, method, l1, start, end, halo_start, halo_end):
+    """Edge response of rows ``start``..``end``, computed from rows ``halo_start``..``halo_end``"""
+    band = gray[halo_start:halo_end]
+    if method == "Laplacian":
+        response = cv2.absdiff(cv2.Laplacian(band, cv2.CV_16S, ksize=3, borderType=_BORDER), 0)
+    else:
+        dx, dy = compute_gradients(band, method)
+        response = _band_magnitude(dx, dy, l1)
+    return response[start - halo_start:end - halo_start]
+
+
+def edge_magnitude(gray, method="Sobel", magnitude="L2", output="Saturate", dst=None,
+                   band_rows=EDGE_BAND_ROWS):
+    """8-bit gradient magnitude (or absolute Laplacian) of a grayscale image
+
+    ``dst`` is an optional preallocated uint8 output of the image's shape.
+    """
+    if method not in ("Sobel", "Scharr", "Laplacian"):
+        raise ValueError(f"Unknown edge method: {method}")
+    if magnitude not in EDGE_MAGNITUDES:
+        raise ValueError(f"Unknown gradient magnitude: {magnitude}")
+    if output not in EDGE_OUTPUTS:
+        raise ValueError(f"Unknown edge output: {output}")
+    height = gray.shape[0]
+    l1 = magnitude == "L1"
+    if dst is None:
+        dst = np.empty(gray.shape, np.uint8)
+    # Normalizing needs the global maximum, so keep the full-range magnitude
+    full = np.empty(gray.shape, np.uint16) if output == "Normalize" else None
+
+    for start in range(0, height, band_rows):
+        end = min(start + band_rows, height)
+        # The 3x3 apertures need one row of context on each side
+        halo_start, halo_end = max(start - 1, 0), min(end + 1, height)
+        response = _band_response(gray, method, l1, start, end, halo_start, halo_end)
+        if full is None:
+            cv2.convertScaleAbs(response, dst=dst[start:end])
+        else:
+            np.copyto(full[start:end], np.rint(response) if response.dtype == np.float32 else response,
+                      casting="unsafe")
+
+    if full is not None:
+        peak = cv2.minMaxLoc(full)[1]
+        cv2.convertScaleAbs(full, dst=dst, alpha=255.0 / peak if peak else 0.0)
+    return dst
+
+
+def canny(gray, threshold1, threshold2, dst=None, l2gradient=False):
+    """``cv2.Canny``; its gradient norm is L1 unless ``l2gradient`` is set"""
+    return cv2.Canny(gray, threshold1, threshold2, edges=dst, L2gradient=l2gradient)
+
+
+def detect_edges(gray, params, dst=None):
+    """Run the edge detection described by the ``Edge Detection`` parameters"""
+    method = params["edge_method"]
+    if method == "Canny":
+        return canny(gray, params["canny_thresh1"], params["canny_thresh2"], dst)
+    return edge_magnitude(gray, method, params["edge_magnitude"], params["edge_output"], dst)
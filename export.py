@@ -0,0 +1,142 @@
+"""Encoding and writing of result images
+
+Results are encoded straight from their NumPy arrays (BGR or gray) with
+``cv2.imencode``, without a round trip through PIL. Encoder speed and size
+tradeoffs are set with ``ExportOptions``:
+
+* ``png_compress_level`` 0-9: 0 stores raw data, 1 (the default) is the
+  fastest compressing level; higher levels take 2-3x longer for files that
+  are usually only a few percent smaller.
+* ``tiff_compression``: ``"none"`` (fastest, written through a memory map
+  when ``tifffile`` is installed), ``"packbits"``, ``"lzw"`` or ``"deflate"``
+  (smallest, slowest).
+* ``jpeg_quality`` 1-100 and ``jpeg_optimize`` (optimized Huffman tables:
+  about 5% smaller files for roughly 2-3x the encoding time).
+
+``.npy`` and ``.raw`` outputs are written through a memory map; formats
+OpenCV cannot encode fall back to PIL. ``export_many`` encodes several
+results at once on a thread pool, since OpenCV releases the GIL while encoding.
+
+OpenCV and the writers are imported on first use, so the GUI can import the
+settings and path helpers at startup.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+ExportOptions = namedtuple("ExportOptions", "png_compress_level tiff_compression jpeg_quality jpeg_optimize",
+                           defaults=(1, "none", 75, False))
+
+TIFF_COMPRESSIONS = {
+    "none": 1,
+    "packbits": 32773,
+    "lzw": 5,
+    "deflate": 8,
+}
+
+CV2_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+MAPPED_OUTPUTS = (".npy", ".raw")
+
+
+def output_path(file_path, out_dir, pipeline, fmt):
+    """Destination path of the result of ``pipeline`` on ``file_path``"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    name = pipeline.steps[0].operation if len(pipeline) == 1 else "pipeline"
+    slug = "".join(c if c.isalnum() else "_" for c in name.lower()).strip("_")
+    return os.path.join(out_dir, f"{stem}_{slug}.{fmt}")
+
+
+def unique_path(path, taken):
+    """``path``, numbered ``stem_2.ext``, ``stem_3.ext``... while already in ``taken``
+
+    The returned path is added to ``taken``, a set of ``os.path.normcase`` paths.
+    """
+    stem, ext = os.path.splitext(path)
+    candidate, n = path, 2
+    while os.path.normcase(candidate) in taken:
+        # Same file name from another folder or format, or other parameters
+        candidate = f"{stem}_{n}{ext}"
+        n += 1
+    taken.add(os.path.normcase(candidate))
+    return candidate
+
+
+def encoder_params(ext, options):
+    """``cv2.imencode`` parameters of a file extension"""
+    import cv2
+
+    if ext == ".png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, int(options.png_compress_level)]
+    if ext in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, int(options.jpeg_quality),
+                cv2.IMWRITE_JPEG_OPTIMIZE, int(bool(options.jpeg_optimize))]
+    if ext in (".tif", ".tiff"):
+        if options.tiff_compression not in TIFF_COMPRESSIONS:
+            raise ValueError(f"Unknown TIFF compression: {options.tiff_compression}")
+        return [cv2.IMWRITE_TIFF_COMPRESSION, TIFF_COMPRESSIONS[options.tiff_compression]]
+    return []
+
+
+def encode(array, ext, options=ExportOptions()):
+    """Encode a BGR (or gray) array into the bytes of an image file"""
+    import cv2
+
+    ok, data = cv2.imencode(ext, array, encoder_params(ext, options))
+    if not ok:
+        raise IOError(f"Could not encode {ext} image")
+    return data
+
+
+def write_image(file_path, array, options=ExportOptions()):
+    """Write a BGR (or gray) result array to ``file_path`` in the format of its extension"""
+    from mmap_io import tifffile, write_mapped
+
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in MAPPED_OUTPUTS or (ext in (".tif", ".tiff") and options.tiff_compression == "none"
+                                 and tifffile is not None):
+        # Uncompressed outputs are written through a preallocated memory map
+        write_mapped(file_path, array, "bgr")
+    elif ext in CV2_EXTENSIONS:
+        data = encode(array, ext, options)
+        with open(file_path, "wb") as f:
+            f.write(data)
+    else:
+        from processing import to_pil
+
+        to_pil(array).save(file_path)
+
+
+def describe_error(error):
+    """Message of a failed write; never empty, even for exceptions raised without one"""
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+def export_many(items, options=ExportOptions(), workers=None, token=None):
+    """Write several ``(file_path, array)`` results concurrently
+
+    Returns the list of ``(file_path, error)`` pairs, ``error`` being None on
+    success and otherwise a message naming the exception type. ``token`` (a ``worker.JobToken``) gets a progress stage per file
+    and stops the export when cancelled.
+    """
+    items = list(items)
+    results = []
+
+    def write(file_path, array):
+        if token is not None:
+            token.check()
+        write_image(file_path, array, options)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                            thread_name_prefix="export") as pool:
+        futures = {pool.submit(write, path, array): path for path, array in items}
+        try:
+            for future in as_completed(futures):
+                error = future.exception()
+                results.append((futures[future], None if error is None else describe_error(error)))
+                if token is not None:
+                    token.check(f"{len(results)}/{len(items)} files")
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return results
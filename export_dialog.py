@@ -0,0 +1,68 @@
+"""Dialog of the GUI for the encoder settings used when saving and exporting"""
+import tkinter as tk
+from tkinter import ttk
+
+from export import TIFF_COMPRESSIONS, ExportOptions
+
+EXPORT_FORMATS = ("png", "jpg", "tif", "bmp", "webp", "npy")
+
+
+class ExportOptionsDialog:
+    """Modal window editing ``app.export_options`` and ``app.export_format``"""
+
+    def __init__(self, app):
+        self.app = app
+        options = app.export_options
+
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Export Options")
+        self.window.configure(bg=app.bg_color, padx=20, pady=15)
+        self.window.resizable(False, False)
+        self.window.transient(app.root)
+
+        self.format_var = tk.StringVar(value=app.export_format)
+        self.png_var = tk.IntVar(value=options.png_compress_level)
+        self.tiff_var = tk.StringVar(value=options.tiff_compression)
+        self.quality_var = tk.IntVar(value=options.jpeg_quality)
+        self.optimize_var = tk.BooleanVar(value=options.jpeg_optimize)
+
+        self._row("Export All format:", ttk.Combobox(self.window, textvariable=self.format_var,
+                                                      values=EXPORT_FORMATS, state="readonly"))
+        self._row("PNG compression (0 fastest - 9 smallest):",
+                  tk.Scale(self.window, from_=0, to=9, orient=tk.HORIZONTAL, variable=self.png_var,
+                           bg=app.bg_color, highlightthickness=0))
+        self._row("TIFF compression:", ttk.Combobox(self.window, textvariable=self.tiff_var,
+                                                     values=list(TIFF_COMPRESSIONS), state="readonly"))
+        self._row("JPEG quality:",
+                  tk.Scale(self.window, from_=1, to=100, orient=tk.HORIZONTAL,
+                           variable=self.quality_var, bg=app.bg_color, highlightthickness=0))
+        tk.Checkbutton(self.window, text="Optimize JPEG (smaller, slower)", variable=self.optimize_var,
+                       bg=app.bg_color, activebackground=app.bg_color,
+                       font=("Segoe UI", 9)).pack(anchor=tk.W, pady=(5, 0))
+
+        button_frame = tk.Frame(self.window, bg=app.bg_color)
+        button_frame.pack(pady=(15, 0))
+        for text, command in (("OK", self.apply), ("Cancel", self.window.destroy)):
+            btn = tk.Button(button_frame, text=text, command=command, width=10,
+                            bg=app.button_color, fg="white", relief=tk.FLAT,
+                            font=("Segoe UI", 10))
+            btn.pack(side=tk.LEFT, padx=5)
+            btn.bind("<Enter>", lambda e, b=btn: b.config(bg=app.button_hover))
+            btn.bind("<Leave>", lambda e, b=btn: b.config(bg=app.button_color))
+
+        self.window.grab_set()
+
+    def _row(self, label_text, widget):
+        tk.Label(self.window, text=label_text, bg=self.app.bg_color, fg=self.app.text_color,
+                 font=("Segoe UI", 9)).pack(anchor=tk.W, pady=(5, 0))
+        widget.pack(fill=tk.X)
+
+    def apply(self):
+        self.app.export_format = self.format_var.get()
+        self.app.export_options = ExportOptions(
+            png_compress_level=self.png_var.get(),
+            tiff_compression=self.tiff_var.get(),
+            jpeg_quality=self.quality_var.get(),
+            jpeg_optimize=self.optimize_var.get(),
+        )
+        self.window.destroy()
@@ -0,0 +1,150 @@
+"""Histogram engine shared by the histogram window and other operations
+
+``compute_histogram`` walks the image once in bands of rows: each band is
+counted for B, G and R and converted to gray while still in cache, so no
+full-size grayscale copy is made (a cached grayscale plane is used when
+given). Huge images can be counted on a strided subsample.
+"""
+import cv2
+import numpy as np
+
+CHANNELS = ("b", "g", "r", "gray")
+CHUNK_ROWS = 256
+
+# Pixel cap used when ``max_samples`` is not given; None counts every pixel
+DEFAULT_MAX_SAMPLES = None
+
+
+class ImageHistogram:
+    """256-bin counts of the B, G, R and gray channels of an image"""
+
+    def __init__(self, counts, step=1):
+        self.counts = counts
+        self.step = step
+
+    def __getitem__(self, channel):
+        return self.counts[CHANNELS.index(channel)]
+
+    def total(self, channel="gray"):
+        return self[channel].sum()
+
+    def probabilities(self, channel="gray"):
+        """Counts normalized to sum to one"""
+        counts = self[channel]
+        total = counts.sum()
+        return counts / total if total else counts
+
+    def cdf(self, channel="gray"):
+        """Cumulative distribution, from 0 to 1"""
+        return np.cumsum(self.probabilities(channel))
+
+    def percentile(self, p, channel="gray"):
+        """Smallest intensity with at least ``p`` percent of the pixels at or below it"""
+        return int(np.searchsorted(self.cdf(channel), p / 100.0 - 1e-12))
+
+    def mean(self, channel="gray"):
+        return float(np.dot(self.probabilities(channel), np.arange(256)))
+
+    def std(self, channel="gray"):
+        levels = np.arange(256)
+        prob = self.probabilities(channel)
+        mean = np.dot(prob, levels)
+        return float(np.sqrt(np.dot(prob, (levels - mean) ** 2)))
+
+    def stats(self, channel="gray"):
+        """Mean, standard deviation, min, median and max of a channel"""
+        nonzero = np.flatnonzero(self[channel])
+        return {
+            "mean": self.mean(channel),
+            "std": self.std(channel),
+            "min": int(nonzero[0]) if nonzero.size else 0,
+            "median": self.percentile(50, channel),
+            "max": int(nonzero[-1]) if nonzero.size else 0,
+        }
+
+
+def sample_step(shape, max_samples):
+    """Stride that keeps the number of sampled pixels below ``max_samples``"""
+    pixels = shape[0] * shape[1]
+    if not max_samples or pixels <= max_samples:
+        return 1
+    return int(np.ceil(np.sqrt(pixels / max_samples)))
+
+
+def _count(plane):
+    return cv2.calcHist([plane], [0], None, [256], [0, 256]).ravel()
+
+
+def compute_histogram(cv_img, gray=None, step=1, max_samples=DEFAULT_MAX_SAMPLES):
+    """Count all channel and luminance histograms of a BGR (or gray) image in one pass"""
+    if cv_img is None or cv_img.ndim not in (2, 3) or cv_img.size == 0:
+        raise ValueError("Invalid image for histogram.")
+
+    step = max(step, sample_step(cv_img.shape, max_samples))
+    view = cv_img[::step, ::step]
+    gray_view = gray[::step, ::step] if gray is not None else None
+    counts = np.zeros((4, 256), np.float64)
+
+    for y in range(0, view.shape[0], CHUNK_ROWS):
+        chunk = view[y:y + CHUNK_ROWS]
+        if chunk.ndim == 2:
+            counts[3] += _count(chunk)
+            continue
+        if step > 1:
+            # Make the strided band contiguous once instead of once per channel
+            chunk = np.ascontiguousarray(chunk)
+        for i in range(3):
+            counts[i] += cv2.calcHist([chunk], [i], None, [256], [0, 256]).ravel()
+        if gray_view is not None:
+            counts[3] += _count(gray_view[y:y + CHUNK_ROWS])
+        else:
+            counts[3] += _count(cv2.cvtColor(chunk, cv2.COLOR_BGR2GRAY))
+
+    if view.ndim == 2:
+        counts[:3] = counts[3]
+    return ImageHistogram(counts, step)
+
+
+class HistogramPlot:
+    """Color and grayscale histogram axes on a figure, updated in place"""
+
+    def __init__(self, figure):
+        self.figure = figure
+        levels = np.arange(256)
+        zeros = np.zeros(256)
+
+        # Color histogram (RGB)
+        self.color_ax = figure.add_subplot(211)
+        self.color_lines = [self.color_ax.plot(levels, zeros, color=col, label=col.upper())[0]
+                            for col in ("b", "g", "r")]
+        self.color_ax.set_title("Color Histogram (RGB)", fontsize=12)
+        self.color_ax.set_xlabel("Intensity Value", fontsize=10)
+        self.color_ax.set_ylabel("Pixel Count", fontsize=10)
+        self.color_ax.legend()
+        self.color_ax.grid(True, linestyle='--', alpha=0.5)
+
+        # Grayscale histogram
+        self.gray_ax = figure.add_subplot(212)
+        self.gray_line = self.gray_ax.plot(levels, zeros, color='black', label='Grayscale')[0]
+        self.gray_ax.set_title("Grayscale Histogram", fontsize=12)
+        self.gray_ax.set_xlabel("Intensity Value", fontsize=10)
+        self.gray_ax.set_ylabel("Pixel Count", fontsize=10)
+        self.gray_ax.legend()
+        self.gray_ax.grid(True, linestyle='--', alpha=0.5)
+
+        figure.tight_layout()
+
+    def update(self, histogram):
+        """Replace the plotted counts with those of ``histogram``"""
+        # Show counts of the full image even when it was subsampled
+        scale = histogram.step ** 2
+        for line, channel in zip(self.color_lines, CHANNELS):
+            line.set_ydata(histogram[channel] * scale)
+        self.gray_line.set_ydata(histogram["gray"] * scale)
+
+        for ax in (self.color_ax, self.gray_ax):
+            ax.relim()
+            ax.autoscale_view()
+        stats = histogram.stats()
+        self.gray_ax.set_title(f"Grayscale Histogram (mean {stats['mean']:.1f}, "
+                               f"std {stats['std']:.1f}, median {stats['median']})", fontsize=12)
@@ -0,0 +1,129 @@
+"""Histogram windows of the GUI and the lifetime of their figures
+
+One live window is refreshed in place for every histogram request. Pinning it
+keeps it as a comparison window; at most ``max_pinned`` of those stay open and
+the oldest is closed when another is pinned. Figures are created without
+pyplot's global figure manager and are released when their window is
+destroyed, however it is closed.
+"""
+import tkinter as tk
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from histogram import HistogramPlot
+
+MAX_PINNED_WINDOWS = 4
+
+
+class HistogramWindow:
+    """A Toplevel showing one HistogramPlot"""
+
+    def __init__(self, manager, title):
+        self.manager = manager
+        app = manager.app
+        self.pinned = False
+
+        # Use a valid matplotlib style
+        with plt.style.context('ggplot'):  # Ganti 'seaborn' dengan 'ggplot' atau style lain yang tersedia
+            self.figure = Figure(figsize=(10, 6), facecolor='#f5f5f5')
+            self.plot = HistogramPlot(self.figure)
+
+        # Create modern histogram window
+        self.window = tk.Toplevel(app.root)
+        self.window.title(title)
+        self.window.geometry("800x600")
+        self.window.configure(bg=app.bg_color)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.bind("<Destroy>", self._on_destroy)
+
+        # Add canvas for figure
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        # Add pin and close buttons
+        button_frame = tk.Frame(self.window, bg=app.bg_color)
+        button_frame.pack(pady=(0, 15))
+        self.pin_btn = self._button(button_frame, "Keep for Comparison", self.pin)
+        self._button(button_frame, "Close", self.close)
+
+    def _button(self, parent, text, command):
+        app = self.manager.app
+        btn = tk.Button(parent, text=text, command=command,
+                        bg=app.button_color, fg="white", relief=tk.FLAT,
+                        font=("Segoe UI", 10))
+        btn.pack(side=tk.LEFT, padx=5)
+        btn.bind("<Enter>", lambda e: btn.config(bg=app.button_hover))
+        btn.bind("<Leave>", lambda e: btn.config(bg=app.button_color))
+        return btn
+
+    def show(self, histogram, title=None):
+        """Draw ``histogram`` and bring the window to the front"""
+        self.plot.update(histogram)
+        self.canvas.draw_idle()
+        if title:
+            self.window.title(title)
+        self.window.lift()
+
+    def pin(self):
+        """Keep this window as it is; the next histogram opens a new live window"""
+        self.pin_btn.destroy()
+        self.window.title(self.window.title() + " (pinned)")
+        self.manager.pin(self)
+
+    def close(self):
+        if self.window is not None:
+            self.window.destroy()
+
+    def _on_destroy(self, event):
+        # <Destroy> is also delivered for every child widget
+        if event.widget is not self.window:
+            return
+        self.window = None
+        self.canvas = None
+        self.figure.clear()
+        plt.close(self.figure)
+        self.figure = None
+        self.plot = None
+        self.manager.forget(self)
+
+
+class HistogramWindowManager:
+    """Owns the live histogram window and the pinned comparison windows"""
+
+    def __init__(self, app, max_pinned=MAX_PINNED_WINDOWS):
+        self.app = app
+        self.max_pinned = max_pinned
+        self.live = None
+        self.pinned = []
+
+    def show(self, histogram, title="Image Histogram"):
+        """Show a histogram in the live window, creating it if needed"""
+        if self.live is None:
+            self.live = HistogramWindow(self, title)
+        self.live.show(histogram, title)
+
+    def pin(self, window):
+        if window is self.live:
+            self.live = None
+        window.pinned = True
+        self.pinned.append(window)
+        while len(self.pinned) > self.max_pinned:
+            # Evict the oldest comparison window
+            self.pinned.pop(0).close()
+
+    def forget(self, window):
+        """Drop a destroyed window"""
+        if window is self.live:
+            self.live = None
+        if window in self.pinned:
+            self.pinned.remove(window)
+
+    def close_all(self):
+        for window in self.pinned + [self.live]:
+            if window is not None:
+                window.close()
+
+    def __len__(self):
+        return len(self.pinned) + (self.live is not None)
@@ -0,0 +1,133 @@
+"""Format-aware decoding of image files
+
+Opening an image only reads its header. Pixels are decoded on demand in one
+of two ways:
+
+* ``preview`` decodes just enough resolution to fill a view. JPEGs are decoded
+  at 1/2, 1/4 or 1/8 scale straight out of the DCT (``cv2.IMREAD_REDUCED_*``,
+  or PIL's ``draft`` for JPEGs OpenCV cannot read), which is several times
+  faster than a full decode and never allocates the full-size image.
+* ``full`` decodes the full resolution, only when an operation or a save
+  needs it. JPEG, PNG, WebP and BMP files are read by OpenCV, which decodes
+  straight into BGR order at about twice PIL's speed for JPEG; other formats
+  go through PIL.
+
+OpenCV applies the EXIF orientation itself; on the PIL path
+``ImageOps.exif_transpose`` rotates the decoded image in place, so no extra
+full-size copy is made (and none at all for unrotated images).
+"""
+import cv2
+from PIL import Image, ImageOps
+
+from mmap_io import is_mappable, open_mapped
+from processing import pil_to_bgr
+
+# PIL formats OpenCV decodes identically, with the EXIF orientation applied
+CV2_FORMATS = {"JPEG", "PNG", "WEBP", "BMP"}
+# Modes whose conversion to BGR is the same in OpenCV and PIL
+CV2_MODES = {"L", "RGB"}
+
+# Formats that decode faster at reduced resolution
+REDUCIBLE_FORMATS = {"JPEG"}
+REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Mapped files are only ever upright (see mmap_io.is_mappable)
+MAPPED_DECODING = {"decoder": "mapped", "orientation": 1}
+
+_EXIF_ORIENTATION = 0x0112
+# Orientations that swap width and height
+_TRANSPOSED = {5, 6, 7, 8}
+
+
+def reduction_factor(size, view_size):
+    """Largest JPEG scale denominator whose decode still fills ``view_size``"""
+    scale = min(view_size[0] / size[0], view_size[1] / size[1])
+    factor = 1
+    for candidate in sorted(REDUCED_FLAGS):
+        if candidate * scale <= 1:
+            factor = candidate
+    return factor
+
+
+class ImageSource:
+    """An image file whose pixels are decoded on demand
+
+    With ``map_pixels`` uncompressed files are memory-mapped instead of decoded
+    (see ``mmap_io``).
+    """
+
+    def __init__(self, path, map_pixels=False):
+        self.path = path
+        self.mapped = map_pixels and is_mappable(path)
+        with Image.open(path) as img:
+            # Only the header is read here
+            self.format = img.format
+            self.mode = img.mode
+            self.orientation = orientation = img.getexif().get(_EXIF_ORIENTATION, 1)
+            width, height = img.size
+        if self.mapped:
+            # Only upright files are mapped (see mmap_io.is_mappable)
+            height, width = open_mapped(path).array.shape[:2]
+        elif orientation in _TRANSPOSED and self.format != "TIFF":
+            # PIL already reports (and decodes) TIFFs in their display orientation
+            width, height = height, width
+        self.size = (width, height)
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    @property
+    def _use_cv2(self):
+        return self.format in CV2_FORMATS and self.mode in CV2_MODES
+
+    @property
+    def decoding(self):
+        """How ``full`` decodes the file, as part of result cache keys"""
+        if self.mapped:
+            return MAPPED_DECODING
+        return {"decoder": "cv2" if self._use_cv2 else "pil", "orientation": self.orientation}
+
+    def full(self):
+        """Full-resolution BGR array (gray stays 2D for memory-mapped files)"""
+        if self.mapped:
+            return open_mapped(self.path).bgr()
+        if self._use_cv2:
+            array = cv2.imread(self.path, cv2.IMREAD_COLOR)
+            if array is not None:
+                return array
+        with Image.open(self.path) as img:
+            ImageOps.exif_transpose(img, in_place=True)
+            return pil_to_bgr(img)
+
+    def preview(self, view_size):
+        """BGR array with at least the resolution needed to fill ``view_size``
+
+        Formats that do not decode faster at reduced size return the full image.
+        """
+        factor = reduction_factor(self.size, view_size)
+        if self.mapped or self.format not in REDUCIBLE_FORMATS or factor == 1:
+            return self.full()
+        if self._use_cv2:
+            array = cv2.imread(self.path, REDUCED_FLAGS[factor])
+            if array is not None:
+                return array
+        with Image.open(self.path) as img:
+            width, height = img.size
+            # draft picks the smallest DCT scale still at least this large
+            img.draft("RGB", (-(-width // factor), -(-height // factor)))
+            ImageOps.exif_transpose(img, in_place=True)
+            return pil_to_bgr(img)
+
+
+def load_bgr(file_path):
+    """Load an image file as an OpenCV BGR array"""
+    return ImageSource(file_path).full()
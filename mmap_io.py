@@ -0,0 +1,184 @@
+"""Memory-mapped reading and writing of uncompressed image data
+
+Uncompressed TIFFs (through the optional ``tifffile`` package), ``.npy``
+arrays and raw sensor dumps are mapped with ``np.memmap`` instead of being
+decoded and copied: the mapped array is handed to the OpenCV operations as is,
+and results are written into a preallocated mapped output file.
+
+Mapped arrays keep the channel order of the file (RGB for TIFF). Gray inputs
+are used without any copy; color inputs only pay for the conversion the
+operation needs (RGB to gray directly, or RGB to BGR for per-channel operations).
+"""
+import functools
+import os
+
+import cv2
+import numpy as np
+
+from processing import CHANNEL_OPERATIONS
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+MAPPED_EXTENSIONS = (".tif", ".tiff", ".npy", ".raw")
+
+_TIFF_ORIENTATION = 274
+
+# (samples per pixel, photometric) of TIFF pages whose pixels map as gray or RGB
+_MAPPABLE_LAYOUTS = () if tifffile is None else (
+    (1, tifffile.PHOTOMETRIC.MINISBLACK),
+    (3, tifffile.PHOTOMETRIC.RGB),
+)
+
+
+def parse_raw_shape(text):
+    """Parse a raw image shape such as ``4000x3000`` or ``4000x3000x3`` (width x height [x channels])"""
+    parts = [int(p) for p in text.lower().split("x")]
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Raw shape must be WIDTHxHEIGHT[xCHANNELS]: {text}")
+    width, height = parts[:2]
+    return (height, width) + tuple(parts[2:])
+
+
+class MappedImage:
+    """A memory-mapped 8-bit image and the channel order of its file"""
+
+    def __init__(self, array, order):
+        self.array = array
+        self.order = order
+
+    @property
+    def is_gray(self):
+        return self.array.ndim == 2
+
+    def gray(self):
+        """Grayscale plane, converted straight from the file's channel order"""
+        if self.is_gray:
+            return self.array
+        code = cv2.COLOR_RGB2GRAY if self.order == "rgb" else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(self.array, code)
+
+    def bgr(self):
+        """Array usable as the BGR input of the operations (gray stays 2D)"""
+        if self.is_gray or self.order == "bgr":
+            return self.array
+        return cv2.cvtColor(self.array, cv2.COLOR_RGB2BGR)
+
+
+def _check_uint8(array):
+    if array.dtype != np.uint8 or array.ndim not in (2, 3):
+        raise ValueError("Only 8-bit gray or color images can be memory-mapped")
+    if array.ndim == 3:
+        if array.shape[2] == 1:
+            return array[..., 0]
+        if array.shape[2] != 3:
+            raise ValueError("Only 1 or 3 channel images can be memory-mapped")
+    return array
+
+
+def is_mappable(file_path):
+    """Whether a file can be opened with ``open_mapped`` without extra arguments"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".npy":
+        return True
+    if ext in (".tif", ".tiff") and tifffile is not None:
+        try:
+            with tifffile.TiffFile(file_path) as tif:
+                page = tif.pages[0]
+                # Alpha, CMYK, palette and planar layouts need decoding to become gray or RGB
+                return (page.is_contiguous and page.dtype == np.uint8 and len(tif.pages) == 1
+                        and (page.samplesperpixel, page.photometric) in _MAPPABLE_LAYOUTS
+                        and (page.samplesperpixel == 1
+                             or page.planarconfig == tifffile.PLANARCONFIG.CONTIG)
+                        # Mapped pixels are used as stored; rotated pages are decoded upright
+                        and page.tags.valueof(_TIFF_ORIENTATION, 1) == 1)
+        except Exception:
+            return False
+    return False
+
+
+def open_mapped(file_path, raw_shape=None, raw_offset=0):
+    """Map an uncompressed image file read-only
+
+    ``raw_shape`` (height, width[, channels]) is required for ``.raw`` dumps,
+    which are read as BGR when they have three channels.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".npy":
+        return MappedImage(_check_uint8(np.load(file_path, mmap_mode="r")), "bgr")
+    if ext in (".tif", ".tiff"):
+        if tifffile is None:
+            raise ValueError("Memory-mapping TIFF files needs the tifffile package")
+        return MappedImage(_check_uint8(tifffile.memmap(file_path, mode="r")), "rgb")
+    if raw_shape is None:
+        raise ValueError(f"Cannot memory-map {os.path.basename(file_path)} without a raw shape")
+    return MappedImage(_check_uint8(np.memmap(file_path, np.uint8, "r", raw_offset, raw_shape)), "bgr")
+
+
+def file_order(file_path):
+    """Channel order color data is stored in for a file type"""
+    return "rgb" if os.path.splitext(file_path)[1].lower() in (".tif", ".tiff") else "bgr"
+
+
+def create_mapped_output(file_path, shape):
+    """Create a preallocated output file of ``shape`` and return it mapped for writing
+
+    Color data must be written in ``file_order(file_path)``.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".npy":
+        return np.lib.format.open_memmap(file_path, mode="w+", dtype=np.uint8, shape=shape)
+    if ext in (".tif", ".tiff"):
+        if tifffile is None:
+            raise ValueError("Memory-mapping TIFF files needs the tifffile package")
+        photometric = "rgb" if len(shape) == 3 else "minisblack"
+        return tifffile.memmap(file_path, shape=shape, dtype=np.uint8,
+                               photometric=photometric, bigtiff=bool(np.prod(shape) > 2**31))
+    if ext == ".raw":
+        return np.memmap(file_path, np.uint8, "w+", 0, shape)
+    raise ValueError(f"Cannot memory-map output of type {ext or 'unknown'}")
+
+
+def write_mapped(file_path, array, order="bgr"):
+    """Write an image array of channel ``order`` into a preallocated mapped file"""
+    out = create_mapped_output(file_path, array.shape)
+    if array.ndim == 3 and order != file_order(file_path):
+        # Swapping R and B is the same conversion in both directions
+        cv2.cvtColor(array, cv2.COLOR_BGR2RGB, dst=out)
+    else:
+        out[...] = array
+    out.flush()
+    del out
+
+
+def run_mapped(pipeline, in_path, out_path, raw_shape=None, executor=None):
+    """Run a pipeline from a mapped input straight into a mapped output file
+
+    With a ``parallel.StripExecutor`` the strips are written into the output
+    map from several threads.
+    """
+    run = pipeline.run if executor is None else functools.partial(executor.run, pipeline)
+    mapped = open_mapped(in_path, raw_shape)
+    operations = {step.operation for step in pipeline.steps}
+
+    if mapped.is_gray or operations <= CHANNEL_OPERATIONS:
+        # Gray data or per-channel ops only: work in the file's channel order
+        cv_img, gray, order = mapped.array, None, mapped.order
+    elif pipeline.steps[0].operation not in CHANNEL_OPERATIONS:
+        # The first step only needs the grayscale plane
+        cv_img, gray, order = mapped.array, mapped.gray(), mapped.order
+    else:
+        cv_img, gray, order = mapped.bgr(), None, "bgr"
+
+    shape = pipeline.output_shape(cv_img.shape)
+    if len(shape) == 3 and order != file_order(out_path):
+        write_mapped(out_path, run(cv_img, gray), order)
+        return shape
+
+    out = create_mapped_output(out_path, shape)
+    run(cv_img, gray, out=out)
+    out.flush()
+    del out
+    return shape
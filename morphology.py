@@ -0,0 +1,132 @@
+"""Morphology engine behind Dilasi, Erosi, Opening and Closing
+
+Rectangular structuring elements are never applied iteration by iteration:
+``n`` passes of a ``k x k`` box equal one box of ``n*(k-1)+1``, so iterations
+are collapsed first. Boxes up to ``VHGW_MIN_SIZE`` go to OpenCV, whose
+rectangular morphology already runs as fused row and column passes. Larger
+boxes are split into a horizontal and a vertical 1D pass computed with the
+van Herk/Gil-Werman algorithm, whose cost per pixel does not grow with the
+kernel size.
+
+Ellipses and crosses are applied with their OpenCV structuring elements;
+OpenCV only visits the nonzero kernel cells, which is faster for these
+sizes than unions of line passes.
+
+Borders behave as in OpenCV: pixels outside the image never win.
+"""
+import cv2
+import numpy as np
+
+from operations import MORPH_OPERATIONS, SHAPES  # noqa: F401 (re-exported)
+
+# Boxes at least this large use van Herk/Gil-Werman passes instead of OpenCV
+VHGW_MIN_SIZE = 256
+
+_CV_SHAPES = {"Rect": cv2.MORPH_RECT, "Ellipse": cv2.MORPH_ELLIPSE, "Cross": cv2.MORPH_CROSS}
+
+
+def effective_size(kernel_size, iterations):
+    """Side of the single box equal to ``iterations`` passes of a ``kernel_size`` box"""
+    return iterations * (kernel_size - 1) + 1
+
+
+def morph_halo(operation, kernel_size, iterations):
+    """Pixels of context the result at one pixel depends on, per side"""
+    reach = (kernel_size // 2) * iterations
+    return 2 * reach if operation in ("Opening", "Closing") else reach
+
+
+def _vhgw_rows(src, size, before, dilate):
+    """Van Herk/Gil-Werman running max (or min) over ``size`` rows
+
+    The window of output row ``i`` starts ``before`` rows above it. Within
+    blocks of ``size`` rows a forward running extreme ``g`` and a backward one
+    ``h`` are computed; a window starting at padded row ``i`` is then
+    ``max(h[i], g[i + size - 1])``, three comparisons per pixel whatever the size.
+    """
+    reduce = np.maximum if dilate else np.minimum
+    height = src.shape[0]
+    blocks = -(-(height + size - 1) // size)
+    padded = np.full((blocks * size,) + src.shape[1:], 0 if dilate else 255, np.uint8)
+    padded[before:before + height] = src
+
+    h = padded.reshape((blocks, size) + src.shape[1:])
+    g = np.empty_like(h)
+    g[:, 0] = h[:, 0]
+    for j in range(1, size):
+        reduce(g[:, j - 1], h[:, j], out=g[:, j])
+    # The backward pass only reads rows it has not overwritten yet
+    for j in range(size - 2, -1, -1):
+        reduce(h[:, j + 1], h[:, j], out=h[:, j])
+    g = g.reshape(padded.shape)
+    return reduce(padded[:height], g[size - 1:size - 1 + height])
+
+
+def _line(src, length, anchor, horizontal, dilate):
+    """Van Herk/Gil-Werman 1D dilation or erosion along one axis"""
+    if horizontal:
+        # Rows are contiguous, so run the column algorithm on the transpose
+        return cv2.transpose(_vhgw_rows(cv2.transpose(src), length, anchor, dilate))
+    return _vhgw_rows(src, length, anchor, dilate)
+
+
+def _box(src, kernel_size, iterations, dilate, dst=None):
+    """``iterations`` passes of a square box as one larger box"""
+    size = effective_size(kernel_size, iterations)
+    # Each pass of an even kernel shifts by its anchor, so the shifts add up
+    anchor = iterations * (kernel_size // 2)
+    if size < VHGW_MIN_SIZE:
+        func = cv2.dilate if dilate else cv2.erode
+        return func(src, np.ones((size, size), np.uint8), dst=dst, anchor=(anchor, anchor))
+    result = _line(_line(src, size, anchor, True, dilate), size, anchor, False, dilate)
+    if dst is None:
+        return result
+    np.copyto(dst, result)
+    return dst
+
+
+def _basic(src, kernel_size, iterations, shape, dilate, dst=None):
+    """Dilate or erode ``iterations`` times with a structuring element"""
+    if shape == "Rect":
+        return _box(src, kernel_size, iterations, dilate, dst=dst)
+    if shape in _CV_SHAPES:
+        kernel = cv2.getStructuringElement(_CV_SHAPES[shape], (kernel_size, kernel_size))
+        func = cv2.dilate if dilate else cv2.erode
+        return func(src, kernel, dst=dst, iterations=iterations)
+    raise ValueError(f"Unknown structuring element: {shape}")
+
+
+def dilate(src, kernel_size, iterations=1, shape="Rect", dst=None):
+    return _basic(src, kernel_size, iterations, shape, True, dst=dst)
+
+
+def erode(src, kernel_size, iterations=1, shape="Rect", dst=None):
+    return _basic(src, kernel_size, iterations, shape, False, dst=dst)
+
+
+def morphology(src, operation, kernel_size, iterations=1, shape="Rect", dst=None):
+    """Apply one of ``MORPH_OPERATIONS``; matches ``cv2.morphologyEx`` semantics
+
+    ``dst`` is an optional preallocated output that must not alias ``src``.
+    """
+    kernel_size, iterations = int(kernel_size), int(iterations)
+    if kernel_size < 1 or iterations < 1:
+        raise ValueError("Kernel size and iterations must be at least 1")
+
+    if operation == "Dilasi":
+        return dilate(src, kernel_size, iterations, shape, dst=dst)
+    elif operation == "Erosi":
+        return erode(src, kernel_size, iterations, shape, dst=dst)
+    elif operation == "Opening":
+        return dilate(erode(src, kernel_size, iterations, shape), kernel_size, iterations, shape, dst=dst)
+    elif operation == "Closing":
+        return erode(dilate(src, kernel_size, iterations, shape), kernel_size, iterations, shape, dst=dst)
+    raise ValueError(f"Unknown morphology operation: {operation}")
+
+
+def reference_morphology(src, operation, kernel_size, iterations=1, shape="Rect"):
+    """Plain ``cv2.morphologyEx`` with a 2D kernel, the baseline of the engine"""
+    codes = {"Dilasi": cv2.MORPH_DILATE, "Erosi": cv2.MORPH_ERODE,
+             "Opening": cv2.MORPH_OPEN, "Closing": cv2.MORPH_CLOSE}
+    kernel = cv2.getStructuringElement(_CV_SHAPES[shape], (kernel_size, kernel_size))
+    return cv2.morphologyEx(src, codes[operation], kernel, iterations=iterations)
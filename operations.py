@@ -0,0 +1,64 @@
+"""Catalog of the image operations and their parameters
+
+Names, defaults and parameter choices only; this module imports nothing
+heavy, so the GUI can build its widgets and edit pipelines before OpenCV is
+loaded (see ``processing`` for the implementations).
+"""
+
+OPERATIONS = [
+    "Grayscale",
+    "Biner (Threshold)",
+    "Brightness/Contrast",
+    "Gamma",
+    "Levels",
+    "Curves",
+    "Operasi Logika",
+    "Histogram",
+    "Dilasi",
+    "Erosi",
+    "Opening",
+    "Closing",
+    "Edge Detection"
+]
+
+# Parameter names follow the Tk variables of the GUI without the "_var" suffix
+DEFAULT_PARAMS = {
+    "Grayscale": {},
+    "Biner (Threshold)": {"threshold": 128},
+    "Brightness/Contrast": {"brightness": 0, "contrast": 1.0},
+    "Gamma": {"gamma": 1.0},
+    "Levels": {"levels_black": 0, "levels_white": 255, "levels_gamma": 1.0,
+               "levels_out_black": 0, "levels_out_white": 255},
+    "Curves": {"curve_shadows": 64, "curve_midtones": 128, "curve_highlights": 192},
+    "Operasi Logika": {"logic_op": "AND"},
+    "Histogram": {},
+    "Dilasi": {"morph_kernel": 3, "morph_iter": 1, "morph_shape": "Rect"},
+    "Erosi": {"morph_kernel": 3, "morph_iter": 1, "morph_shape": "Rect"},
+    "Opening": {"morph_kernel": 3, "morph_iter": 1, "morph_shape": "Rect"},
+    "Closing": {"morph_kernel": 3, "morph_iter": 1, "morph_shape": "Rect"},
+    "Edge Detection": {"edge_method": "Canny", "canny_thresh1": 100, "canny_thresh2": 200,
+                       "edge_magnitude": "L2", "edge_output": "Saturate"},
+}
+
+# Operations that only inspect the image and do not produce a result image
+ANALYSIS_OPERATIONS = {"Histogram"}
+
+# Choices of the morphology and edge detection parameters
+MORPH_OPERATIONS = ("Dilasi", "Erosi", "Opening", "Closing")
+SHAPES = ("Rect", "Ellipse", "Cross")
+EDGE_METHODS = ("Canny", "Sobel", "Scharr", "Laplacian")
+EDGE_OUTPUTS = ("Saturate", "Normalize")
+EDGE_MAGNITUDES = ("L2", "L1")
+
+
+def resolve_params(choice, params=None):
+    """Merge user parameters with the defaults of an operation"""
+    if choice not in DEFAULT_PARAMS:
+        raise ValueError(f"Unknown operation: {choice}")
+
+    resolved = dict(DEFAULT_PARAMS[choice])
+    for key, value in (params or {}).items():
+        if key not in resolved:
+            raise ValueError(f"Unknown parameter for {choice}: {key}")
+        resolved[key] = value
+    return resolved
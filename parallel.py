@@ -0,0 +1,98 @@
+"""Strip-parallel execution of a pipeline on one image
+
+The image is split into full-width horizontal strips that run on a thread
+pool; OpenCV releases the GIL, so strips of one image use several cores.
+Neighborhood operations get their halo rows (see ``tiling.pipeline_halo``)
+on both sides of a strip, and the central rows of each result land in a
+preallocated output. Strips of halo-free pipelines are written straight
+into their slice of the output, without any intermediate copy.
+
+Canny's hysteresis is global, so pipelines containing it only run in
+strips when ``approximate`` is set (as the tiled file processing does).
+Normalized edge output is scaled by the peak of the whole image and always
+runs whole.
+"""
+import os
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from tiling import has_normalized_step, pipeline_halo
+
+DEFAULT_STRIP_ROWS = 256
+
+# Below this many pixels thread handoffs cost more than they save
+MIN_PARALLEL_PIXELS = 1_000_000
+
+
+def has_global_step(pipeline):
+    """Whether a pipeline contains a step no finite halo reproduces exactly"""
+    return has_normalized_step(pipeline) or any(
+        step.operation == "Edge Detection" and step.params.get("edge_method") == "Canny"
+        for step in pipeline.steps)
+
+
+class StripExecutor:
+    """Runs pipelines strip by strip on a shared thread pool"""
+
+    def __init__(self, workers=None, strip_rows=DEFAULT_STRIP_ROWS, approximate=False):
+        if strip_rows < 1:
+            raise ValueError("Strip size must be at least one row")
+        self.workers = workers or os.cpu_count() or 1
+        self.strip_rows = strip_rows
+        self.approximate = approximate
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="strip")
+            return self._pool
+
+    def strips(self, height):
+        """``(y0, y1)`` row ranges of the strips of an image"""
+        return [(y, min(y + self.strip_rows, height)) for y in range(0, height, self.strip_rows)]
+
+    def run(self, pipeline, cv_img, gray=None, token=None, out=None):
+        """Run a pipeline like ``Pipeline.run``, in parallel strips when worthwhile"""
+        height, width = cv_img.shape[:2]
+        strips = self.strips(height)
+        if (self.workers == 1 or len(strips) == 1 or height * width < MIN_PARALLEL_PIXELS
+                or (has_global_step(pipeline) and not self.approximate)
+                or has_normalized_step(pipeline)):
+            return pipeline.run(cv_img, gray, token, out=out)
+
+        halo = pipeline_halo(pipeline)
+        if out is None:
+            out = np.empty(pipeline.output_shape(cv_img.shape), np.uint8)
+
+        def run_strip(y0, y1):
+            start, end = max(y0 - halo, 0), min(y1 + halo, height)
+            band_gray = gray[start:end] if gray is not None else None
+            window = (start, 0, height, width)
+            if start == y0 and end == y1:
+                # No halo rows: the last step writes straight into the output
+                pipeline.run(cv_img[start:end], band_gray, token, window, out=out[y0:y1])
+            else:
+                result = pipeline.run(cv_img[start:end], band_gray, token, window)
+                out[y0:y1] = result[y0 - start:y1 - start]
+
+        pool = self._get_pool()
+        futures = [pool.submit(run_strip, y0, y1) for y0, y1 in strips]
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in pending:
+            future.cancel()
+        wait(pending)
+        for future in done:
+            # Re-raise the first failure (e.g. JobCancelled) in the caller
+            future.result()
+        return out
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,210 @@
+"""Ordered chains of image operations
+
+A pipeline runs its steps directly on NumPy arrays: no PIL conversion between
+steps, redundant color conversions are skipped and results are written into a
+small pool of preallocated buffers that is reused from step to step.
+Runs of consecutive point operations are fused into one lookup table and
+applied in a single pass.
+
+Building, editing and saving pipelines only needs the operation catalog; the
+processing modules (and OpenCV) are imported when a pipeline first runs.
+"""
+import json
+
+import numpy as np
+
+from operations import ANALYSIS_OPERATIONS, resolve_params
+
+PIPELINE_VERSION = 1
+
+
+class PipelineStep:
+    """One operation of a pipeline with its parameters"""
+
+    def __init__(self, operation, params=None):
+        if operation in ANALYSIS_OPERATIONS:
+            raise ValueError(f"{operation} does not produce an image and cannot be a pipeline step")
+        self.operation = operation
+        self.params = resolve_params(operation, params)
+
+    def describe(self):
+        """Short human readable form, e.g. ``Dilasi (morph_kernel=5, morph_iter=2)``"""
+        if not self.params:
+            return self.operation
+        args = ", ".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.operation} ({args})"
+
+    def to_dict(self):
+        return {"operation": self.operation, "params": dict(self.params)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["operation"], data.get("params", {}))
+
+
+class _PointChain:
+    """Consecutive point operation steps run as one table lookup"""
+
+    def __init__(self, step, key, to_gray):
+        self.steps = [step]
+        self.keys = [key]
+        self.to_gray = to_gray
+        self.operation = step.operation
+
+    def accepts(self, to_gray, input_is_gray):
+        # Gray conversion of a color image is not a point operation, so it
+        # can only happen before the first table of the chain
+        return not to_gray or input_is_gray or self.to_gray
+
+    def add(self, step, key):
+        self.steps.append(step)
+        self.keys.append(key)
+        self.operation += " + " + step.operation
+
+
+class _BufferPool:
+    """Scratch arrays reused between steps, at most two per shape"""
+
+    def __init__(self):
+        self.buffers = []
+
+    def take(self, shape, busy):
+        for buf in self.buffers:
+            if buf.shape == shape and buf is not busy:
+                return buf
+        buf = np.empty(shape, np.uint8)
+        self.buffers.append(buf)
+        return buf
+
+
+class Pipeline:
+    """Ordered list of operations applied one after another"""
+
+    def __init__(self, steps=None):
+        self.steps = list(steps or [])
+
+    def add(self, operation, params=None):
+        self.steps.append(PipelineStep(operation, params))
+
+    def remove(self, index):
+        del self.steps[index]
+
+    def move(self, index, offset):
+        """Move a step up (negative offset) or down the list; return its new index"""
+        target = min(max(index + offset, 0), len(self.steps) - 1)
+        self.steps.insert(target, self.steps.pop(index))
+        return target
+
+    def clear(self):
+        self.steps.clear()
+
+    def __len__(self):
+        return len(self.steps)
+
+    def to_json(self):
+        return json.dumps({"version": PIPELINE_VERSION,
+                           "steps": [step.to_dict() for step in self.steps]}, indent=2)
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(PipelineStep.from_dict(step) for step in data.get("steps", []))
+
+    def save(self, file_path):
+        with open(file_path, "w") as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path) as f:
+            return cls.from_json(f.read())
+
+    def output_shape(self, input_shape):
+        """Shape of the result for an input of ``input_shape``"""
+        from processing import output_shape
+
+        shape = tuple(input_shape)
+        for step in self.steps:
+            shape = output_shape(shape, step.operation)
+        return shape
+
+    def fused_steps(self, input_is_gray=False):
+        """Steps with runs of consecutive point operations merged into chains"""
+        from point_ops import point_key, produces_gray
+        from processing import output_shape
+
+        units = []
+        is_gray = input_is_gray
+        for step in self.steps:
+            key = point_key(step.operation, step.params)
+            chain = units[-1] if units and isinstance(units[-1], _PointChain) else None
+            if key is not None and chain is not None and chain.accepts(produces_gray(key), is_gray):
+                chain.add(step, key)
+            elif key is not None:
+                units.append(_PointChain(step, key, produces_gray(key)))
+            else:
+                units.append(step)
+            is_gray = is_gray or len(output_shape((1, 1, 3), step.operation)) == 2
+        # A lone point operation runs as its own step
+        return [unit.steps[0] if isinstance(unit, _PointChain) and len(unit.steps) == 1 else unit
+                for unit in units]
+
+    def run(self, cv_img, gray=None, token=None, window=None, out=None):
+        """Run every step on a BGR image and return the final array
+
+        ``gray`` is the grayscale plane of ``cv_img`` when already known.
+        ``token`` is an optional worker token checked between steps.
+        ``window`` locates ``cv_img`` inside a larger image when it is a tile.
+        ``out`` is an optional preallocated array (e.g. a memory-mapped file)
+        of ``output_shape`` that receives the result.
+        """
+        from point_ops import apply_table, compile_chain
+        from processing import apply_operation, output_shape, to_gray
+
+        if not self.steps:
+            raise ValueError("Pipeline has no steps")
+
+        pool = _BufferPool()
+        current = cv_img
+        current_gray = gray
+        units = self.fused_steps(cv_img.ndim == 2)
+        last = len(units) - 1
+
+        for i, unit in enumerate(units):
+            if token is not None:
+                token.check(unit.operation)
+
+            # A gray image is its own grayscale plane
+            if current.ndim == 2:
+                if unit.operation == "Grayscale":
+                    continue
+                current_gray = current
+
+            if isinstance(unit, _PointChain):
+                source = current
+                if unit.to_gray and current.ndim == 3:
+                    source = current_gray if current_gray is not None else to_gray(current)
+                shape = source.shape
+            else:
+                shape = output_shape(current.shape, unit.operation)
+
+            if i == last and out is not None and out.shape == shape and out is not current:
+                dst = out
+            else:
+                dst = pool.take(shape, busy=current)
+
+            if isinstance(unit, _PointChain):
+                current = apply_table(source, compile_chain(tuple(unit.keys)), dst=dst)
+            else:
+                current = apply_operation(current, unit.operation, unit.params, current_gray, dst, window)
+            current_gray = None
+
+        if out is not None:
+            if current is not out:
+                np.copyto(out, current)
+            return out
+
+        # Never hand back a pool buffer the caller might see change, or the input itself
+        if current is cv_img or current is gray:
+            return current.copy()
+        return current
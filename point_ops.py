@@ -0,0 +1,143 @@
+"""Point operations on uint8 images as 256-entry lookup tables
+
+A point operation maps every pixel value on its own, so on 8-bit data it is
+fully described by a table of 256 outputs. Tables are built once per
+parameter tuple and cached, so scrubbing a slider back and forth reuses
+them, and a chain of point operations composes into a single table that
+``cv2.LUT`` applies in one pass over the image, whatever the chain length.
+
+Operations are described by hashable keys such as ``("threshold", 128)``;
+``point_key`` derives them from an operation name and its parameters.
+"""
+import math
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# Point operations applied to every channel of a color image
+CHANNEL_POINT_OPERATIONS = ("Brightness/Contrast", "Gamma", "Levels", "Curves")
+
+# Keys of operations that work on the grayscale plane of a color image
+GRAY_KINDS = {"threshold", "invert"}
+
+# Curves are defined by the outputs at these inputs (0 and 255 stay fixed)
+CURVE_INPUTS = (64, 128, 192)
+
+LUT_CACHE_SIZE = 1024
+
+_VALUES = np.arange(256)
+
+
+def _table(values):
+    """Round and saturate float outputs into a read-only uint8 table"""
+    table = np.clip(np.rint(values), 0, 255).astype(np.uint8)
+    # Tables are shared through the caches, so nobody may modify them
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def threshold_table(threshold):
+    """``cv2.THRESH_BINARY`` with a max value of 255"""
+    return _table(np.where(_VALUES > threshold, 255, 0))
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def scale_abs_table(alpha, beta):
+    """``cv2.convertScaleAbs``: saturate(rint(|value * alpha + beta|))"""
+    # OpenCV multiplies and adds in float32 with a single (fused) rounding;
+    # the float64 product of 8-bit values and a float32 alpha is exact
+    scaled = (_VALUES * np.float64(np.float32(alpha)) + np.float64(np.float32(beta))).astype(np.float32)
+    return _table(np.abs(scaled))
+
+
+@lru_cache(maxsize=1)
+def invert_table():
+    return _table(255 - _VALUES)
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def gamma_table(gamma):
+    """Gamma correction; values above 1 brighten the midtones"""
+    if gamma <= 0:
+        raise ValueError("Gamma must be positive")
+    return _table(255.0 * (_VALUES / 255.0) ** (1.0 / gamma))
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def levels_table(black, white, gamma, out_black, out_white):
+    """Input levels ``black``..``white`` with midtone ``gamma``, stretched to the output levels"""
+    if white <= black:
+        raise ValueError("Levels white point must be above the black point")
+    if gamma <= 0:
+        raise ValueError("Gamma must be positive")
+    normalized = np.clip((_VALUES - black) / float(white - black), 0.0, 1.0) ** (1.0 / gamma)
+    return _table(out_black + normalized * (out_white - out_black))
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def curves_table(points):
+    """Piecewise-linear curve through ``(input, output)`` control points"""
+    xs, ys = zip(*sorted(points))
+    return _table(np.interp(_VALUES, xs, ys))
+
+
+_BUILDERS = {
+    "threshold": threshold_table,
+    "scale_abs": scale_abs_table,
+    "invert": invert_table,
+    "gamma": gamma_table,
+    "levels": levels_table,
+    "curves": curves_table,
+}
+
+
+def point_key(choice, params):
+    """Hashable key of an operation if it is a point operation, else None
+
+    ``params`` must be complete (see ``processing.resolve_params``).
+    """
+    if choice == "Biner (Threshold)":
+        # OpenCV compares 8-bit pixels against the floor of the threshold
+        return ("threshold", math.floor(params["threshold"]))
+    if choice == "Brightness/Contrast":
+        return ("scale_abs", float(params["contrast"]), float(params["brightness"]))
+    if choice == "Operasi Logika" and params["logic_op"] == "NOT":
+        return ("invert",)
+    if choice == "Gamma":
+        return ("gamma", float(params["gamma"]))
+    if choice == "Levels":
+        return ("levels", int(params["levels_black"]), int(params["levels_white"]),
+                float(params["levels_gamma"]), int(params["levels_out_black"]),
+                int(params["levels_out_white"]))
+    if choice == "Curves":
+        outputs = (params["curve_shadows"], params["curve_midtones"], params["curve_highlights"])
+        points = ((0, 0),) + tuple((x, int(y)) for x, y in zip(CURVE_INPUTS, outputs)) + ((255, 255),)
+        return ("curves", points)
+    return None
+
+
+def produces_gray(key):
+    """Whether a point operation turns a color image into its grayscale plane first"""
+    return key[0] in GRAY_KINDS
+
+
+def table_for(key):
+    """Lookup table of a single point operation key"""
+    return _BUILDERS[key[0]](*key[1:])
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def compile_chain(keys):
+    """One table equal to applying the point operations ``keys`` in order"""
+    table = table_for(keys[0])
+    for key in keys[1:]:
+        table = table_for(key)[table]
+    table.setflags(write=False)
+    return table
+
+
+def apply_table(src, table, dst=None):
+    """Map every pixel (of every channel) of a uint8 image through a table"""
+    return cv2.LUT(src, table, dst=dst)
@@ -0,0 +1,108 @@
+"""Image operations shared by the GUI and the headless batch engine"""
+import cv2
+import numpy as np
+from PIL import Image
+
+from edges import detect_edges
+from morphology import MORPH_OPERATIONS, morphology
+from operations import ANALYSIS_OPERATIONS, resolve_params
+from point_ops import CHANNEL_POINT_OPERATIONS, apply_table, compile_chain, point_key
+
+# Operations that keep the channels of a color image
+CHANNEL_OPERATIONS = set(CHANNEL_POINT_OPERATIONS)
+
+# Point operations with no dedicated OpenCV function, applied as a lookup table.
+# Single threshold, brightness/contrast and NOT steps keep their OpenCV calls,
+# which beat cv2.LUT; chains of point operations are fused in the pipeline.
+TABLE_OPERATIONS = {"Gamma", "Levels", "Curves"}
+
+
+def pil_to_bgr(img):
+    """Convert a PIL image to an OpenCV BGR array"""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+
+
+def to_gray(cv_img, dst=None):
+    """Return the grayscale plane of a BGR (or already gray) image"""
+    if cv_img.ndim == 2:
+        return cv_img
+    return cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY, dst=dst)
+
+
+def logic_mask(shape, window=None):
+    """Circular mask used by the logic operations
+
+    ``window`` is ``(y0, x0, full_height, full_width)`` when ``shape`` is only a
+    tile of a larger image; the tile then gets its part of the full-image circle.
+    """
+    y0, x0, full_height, full_width = window or (0, 0, shape[0], shape[1])
+    mask = np.zeros(shape, np.uint8)
+    cv2.circle(mask, (full_width//2 - x0, full_height//2 - y0),
+               min(full_height, full_width)//3, 255, -1)
+    return mask
+
+
+def output_shape(shape, choice):
+    """Shape of the result of an operation applied to an image of ``shape``"""
+    if choice in CHANNEL_OPERATIONS:
+        return tuple(shape)
+    return tuple(shape[:2])
+
+
+def apply_operation(cv_img, choice, params=None, gray=None, dst=None, window=None):
+    """Apply one operation to a BGR (or gray) image and return the result array
+
+    ``gray`` may be passed when the grayscale plane is already available.
+    ``dst`` is an optional preallocated uint8 output of ``output_shape``; it
+    must not alias the input. ``window`` locates a tile inside the full image,
+    see ``logic_mask``.
+    """
+    if choice in ANALYSIS_OPERATIONS:
+        raise ValueError(f"{choice} does not produce an image")
+
+    params = resolve_params(choice, params)
+    if gray is None and choice not in CHANNEL_OPERATIONS:
+        gray = to_gray(cv_img, dst=dst if choice == "Grayscale" else None)
+
+    if choice == "Grayscale":
+        return gray
+
+    elif choice == "Biner (Threshold)":
+        _, binary = cv2.threshold(gray, params["threshold"], 255, cv2.THRESH_BINARY, dst=dst)
+        return binary
+
+    elif choice == "Brightness/Contrast":
+        return cv2.convertScaleAbs(cv_img, dst=dst, alpha=params["contrast"], beta=params["brightness"])
+
+    elif choice in TABLE_OPERATIONS:
+        return apply_table(cv_img, compile_chain((point_key(choice, params),)), dst=dst)
+
+    elif choice == "Operasi Logika":
+        operation = params["logic_op"]
+        mask = logic_mask(gray.shape, window)
+
+        if operation == "AND":
+            return cv2.bitwise_and(gray, mask, dst=dst)
+        elif operation == "OR":
+            return cv2.bitwise_or(gray, mask, dst=dst)
+        elif operation == "XOR":
+            return cv2.bitwise_xor(gray, mask, dst=dst)
+        elif operation == "NOT":
+            return cv2.bitwise_not(gray, dst=dst)
+        raise ValueError(f"Unknown logic operation: {operation}")
+
+    elif choice in MORPH_OPERATIONS:
+        return morphology(gray, choice, params["morph_kernel"], params["morph_iter"],
+                          params["morph_shape"], dst=dst)
+
+    elif choice == "Edge Detection":
+        return detect_edges(gray, params, dst)
+
+
+def to_pil(processed):
+    """Convert an operation result to a PIL image"""
+    if len(processed.shape) == 2:
+        return Image.fromarray(processed)
+    return Image.fromarray(cv2.cvtColor(processed, cv2.COLOR_BGR2RGB))
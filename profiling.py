@@ -0,0 +1,169 @@
+"""Per-stage timing of the GUI's work, with Chrome trace export
+
+Code wraps each stage of a job in ``profiler.stage(name)``; the stage records
+its wall time, thread and, when told with ``span.output(value)``, the bytes
+of the data it produced (``span.counted(factory)`` does the same for cache
+factories, so cache hits count nothing). Only outputs are counted, not the
+temporary allocations made on the way. Stages are aggregated per name for the profiling
+panel and can be written as Chrome trace-event JSON (open it in
+``chrome://tracing`` or https://ui.perfetto.dev).
+
+Profiling is switched on and off at runtime. While it is off ``stage``
+returns one shared do-nothing span, so an instrumented stage costs an
+attribute check and a method call.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from cache import estimate_nbytes
+
+# Oldest spans are dropped beyond this many
+MAX_SPANS = 20000
+
+
+class _NullSpan:
+    """Stand-in span used while profiling is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def output(self, value, nbytes=None):
+        return value
+
+    def counted(self, factory):
+        return factory
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed run of a stage"""
+
+    __slots__ = ("profiler", "name", "category", "thread", "start", "duration", "nbytes")
+
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.thread = threading.current_thread()
+        self.start = None
+        self.duration = None
+        self.nbytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = time.perf_counter() - self.start
+        self.profiler._record(self)
+        return False
+
+    def output(self, value, nbytes=None):
+        """Count ``value`` as produced by this stage and return it
+
+        ``nbytes`` overrides the estimate for values it cannot size, such as
+        Tk images or files written by the stage.
+        """
+        self.nbytes += estimate_nbytes(value) if nbytes is None else nbytes
+        return value
+
+    def counted(self, factory):
+        """Wrap a cache factory so its result is counted only when it actually runs"""
+        return lambda: self.output(factory())
+
+
+class StageStats:
+    """Aggregate of all recorded spans of one stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.peak = 0.0
+        self.nbytes = 0
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, span):
+        self.count += 1
+        self.total += span.duration
+        self.last = span.duration
+        self.peak = max(self.peak, span.duration)
+        self.nbytes += span.nbytes
+
+
+class Profiler:
+    """Collects stage spans from any thread while enabled"""
+
+    def __init__(self, enabled=False, max_spans=MAX_SPANS):
+        self.enabled = enabled
+        self.spans = deque(maxlen=max_spans)
+        self.stats = {}
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def stage(self, name, category="stage"):
+        """Context manager timing one run of the stage ``name``"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category)
+
+    def _record(self, span):
+        with self.lock:
+            self.spans.append(span)
+            stats = self.stats.get(span.name)
+            if stats is None:
+                stats = self.stats[span.name] = StageStats(span.name)
+            stats.add(span)
+
+    def clear(self):
+        with self.lock:
+            self.spans.clear()
+            self.stats.clear()
+
+    def summary(self):
+        """Per-stage statistics, most total time first"""
+        with self.lock:
+            stats = list(self.stats.values())
+        return sorted(stats, key=lambda s: s.total, reverse=True)
+
+    def trace_events(self):
+        """The recorded spans as Chrome trace events"""
+        with self.lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in spans:
+            tid = span.thread.ident
+            threads[tid] = span.thread.name
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": {"output_bytes": span.nbytes},
+            })
+        for tid, name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": name}})
+        return events
+
+    def export_chrome_trace(self, path):
+        """Write the recorded spans as a Chrome trace-event JSON file"""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,116 @@
+"""Collapsible panel of the GUI showing the per-stage profile
+
+The header toggles the panel open and closed. While open, the table of
+stage timings is refreshed every ``REFRESH_MS``; profiling itself is
+switched with the panel's checkbox and keeps recording while collapsed.
+"""
+import os
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+REFRESH_MS = 500
+
+COLUMNS = (
+    ("calls", "Calls", 60),
+    ("total", "Total ms", 90),
+    ("mean", "Mean ms", 90),
+    ("last", "Last ms", 90),
+    ("peak", "Max ms", 90),
+    ("mb", "Output MB", 90),
+)
+
+
+class ProfilingPanel:
+    """Stage breakdown of a Profiler, packed at the bottom of ``parent``"""
+
+    def __init__(self, app, parent, profiler):
+        self.app = app
+        self.profiler = profiler
+        self.expanded = False
+        self.refresh_pending = None
+
+        self.frame = tk.Frame(parent, bg=app.bg_color)
+        self.frame.pack(fill=tk.X, side=tk.BOTTOM, pady=(10, 0))
+
+        self.header = tk.Button(self.frame, text="▸ Profiling", anchor=tk.W,
+                                bg=app.bg_color, fg=app.text_color, relief=tk.FLAT,
+                                borderwidth=0, font=("Segoe UI", 10, "bold"),
+                                activebackground=app.bg_color, command=self.toggle)
+        self.header.pack(fill=tk.X)
+
+        self.body = tk.Frame(self.frame, bg=app.bg_color)
+
+        controls = tk.Frame(self.body, bg=app.bg_color)
+        controls.pack(fill=tk.X, pady=(5, 5))
+        self.enabled_var = tk.BooleanVar(value=profiler.enabled)
+        tk.Checkbutton(controls, text="Record stage timings", variable=self.enabled_var,
+                       bg=app.bg_color, fg=app.text_color, activebackground=app.bg_color,
+                       font=("Segoe UI", 9), command=self.set_enabled).pack(side=tk.LEFT)
+        for text, command in (("Export Trace...", self.export_trace), ("Clear", self.clear)):
+            btn = tk.Button(controls, text=text, command=command, bg=app.button_color,
+                            fg="white", relief=tk.FLAT, borderwidth=0,
+                            activebackground=app.button_hover, font=("Segoe UI", 9),
+                            padx=8)
+            btn.pack(side=tk.RIGHT, padx=2)
+            btn.bind("<Enter>", lambda e, b=btn: b.config(bg=app.button_hover))
+            btn.bind("<Leave>", lambda e, b=btn: b.config(bg=app.button_color))
+
+        self.table = ttk.Treeview(self.body, columns=[c[0] for c in COLUMNS], height=8)
+        self.table.heading("#0", text="Stage", anchor=tk.W)
+        self.table.column("#0", width=220, anchor=tk.W)
+        for name, title, width in COLUMNS:
+            self.table.heading(name, text=title, anchor=tk.E)
+            self.table.column(name, width=width, anchor=tk.E)
+        self.table.pack(fill=tk.X)
+
+    def toggle(self):
+        self.expanded = not self.expanded
+        if self.expanded:
+            self.header.config(text="▾ Profiling")
+            self.body.pack(fill=tk.X)
+            self.refresh()
+        else:
+            self.header.config(text="▸ Profiling")
+            self.body.pack_forget()
+            if self.refresh_pending is not None:
+                self.app.root.after_cancel(self.refresh_pending)
+                self.refresh_pending = None
+
+    def set_enabled(self):
+        self.profiler.enabled = self.enabled_var.get()
+
+    def refresh(self):
+        """Redraw the stage table and schedule the next redraw"""
+        self.refresh_pending = None
+        if not self.expanded:
+            return
+        self.table.delete(*self.table.get_children())
+        for stats in self.profiler.summary():
+            self.table.insert("", tk.END, text=stats.name, values=(
+                stats.count,
+                f"{stats.total * 1000:.1f}",
+                f"{stats.mean * 1000:.2f}",
+                f"{stats.last * 1000:.2f}",
+                f"{stats.peak * 1000:.2f}",
+                f"{stats.nbytes / (1024 * 1024):.1f}",
+            ))
+        self.refresh_pending = self.app.root.after(REFRESH_MS, self.refresh)
+
+    def clear(self):
+        self.profiler.clear()
+        if self.expanded:
+            self.table.delete(*self.table.get_children())
+
+    def export_trace(self):
+        """Save the recorded spans as Chrome trace-event JSON"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")],
+            title="Export Profiling Trace"
+        )
+        if file_path:
+            try:
+                self.profiler.export_chrome_trace(file_path)
+                self.app.status_var.set(f"Trace saved to {os.path.basename(file_path)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export trace: {str(e)}")
@@ -0,0 +1,200 @@
+"""Persistent cache of processed results, shared by the GUI and batch runs
+
+A result is addressed by a hash of the source file's contents, how it was
+decoded (decoder and EXIF orientation, which can differ between the GUI and
+batch runs) and the operation steps and their parameters, so the same image processed with the
+same settings is loaded from disk in any later session, whatever its file
+name. Results are stored as uncompressed ``.npy`` files, which load at disk
+speed. The directory is bounded in size; the least recently used results are
+deleted first (a hit refreshes a file's modification time).
+
+Writes go through a temporary file and an atomic rename, so several batch
+worker processes can share one cache directory.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "IMAGE_RESULT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "image_processor", "results"))
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Bump when an operation's output changes so stale results are never served
+CACHE_VERSION = 2
+
+# Eviction trims the cache to this fraction of its budget
+_EVICT_TO = 0.9
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """Content hash of a file, remembered per path, size and modification time"""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _digests_lock:
+        if memo_key in _digests:
+            return _digests[memo_key]
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _digests_lock:
+        _digests[memo_key] = value
+    return value
+
+
+class ResultCache:
+    """Size-bounded LRU directory of ``.npy`` results"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    def key(self, source_digest, pipeline, decoding=None):
+        """Cache key of a pipeline applied to the source with ``source_digest``
+
+        ``decoding`` describes how the source was decoded (see
+        ``loader.ImageSource.decoding``).
+        """
+        description = json.dumps({"version": CACHE_VERSION, "source": source_digest,
+                                  "decoding": decoding,
+                                  "steps": [step.to_dict() for step in pipeline.steps]},
+                                 sort_keys=True)
+        return hashlib.blake2b(description.encode(), digest_size=20).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".npy")
+
+    def get(self, key):
+        """The cached result for ``key``, or None"""
+        path = self._path(key)
+        try:
+            result = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, or evicted or truncated by another process meanwhile
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return result
+
+    def put(self, key, array):
+        """Store a result, evicting the least recently used ones over budget"""
+        if array.nbytes > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+            try:
+                # Replacing a result only adds the difference in size
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self.lock:
+            self.total_bytes += os.path.getsize(path) - replaced
+            over_budget = self.total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def _entries(self):
+        """``(mtime, path, size)`` of every stored result"""
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".npy"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def evict(self):
+        """Delete least recently used results until the cache is under budget"""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * _EVICT_TO
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        with self.lock:
+            self.total_bytes = total
+
+    def clear(self):
+        for _, path, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self.lock:
+            self.total_bytes = 0
+
+    def describe(self):
+        """Hit/miss statistics for the status bar"""
+        return (f"cache {self.hits} hit / {self.misses} miss, "
+                f"{self.total_bytes / (1024 * 1024):.0f} MB")
+
+
+def lookup(cache, source_path, pipeline, decoding=None):
+    """``(key, result)`` of ``pipeline`` on ``source_path``; ``result`` is None on a miss
+
+    ``key`` is None without a cache or a source file, when nothing can be stored.
+    """
+    if cache is None or source_path is None:
+        return None, None
+    key = cache.key(file_digest(source_path), pipeline, decoding)
+    return key, cache.get(key)
+
+
+def store(cache, key, result):
+    """Add a result missed by ``lookup`` under its ``key``"""
+    if key is None:
+        return
+    try:
+        cache.put(key, result)
+    except OSError:
+        # A full or read-only cache must never fail the processing itself
+        pass
+
+
+def run_cached(cache, source_path, pipeline, compute, decoding=None):
+    """Return ``compute()``, or the cached result of ``pipeline`` on ``source_path``
+
+    Returns ``(result, hit)``. Without a cache or a source file this just computes.
+    """
+    key, result = lookup(cache, source_path, pipeline, decoding)
+    if result is not None:
+        return result, True
+    result = compute()
+    store(cache, key, result)
+    return result, False
@@ -0,0 +1,30 @@
+"""Batch outputs of inputs with the same file name must not overwrite each other"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import run_batch
+from pipeline import Pipeline, PipelineStep
+
+
+def test_colliding_output_names_are_numbered(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for name in ("a/x.png", "a/x.jpg", "b/x.png"):
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        cv2.imwrite(str(path), rng.integers(0, 256, (40, 50, 3), dtype=np.uint8))
+        paths.append(str(path))
+
+    out_dir = tmp_path / "out"
+    results = run_batch(paths, str(out_dir), Pipeline([PipelineStep("Grayscale")]),
+                        workers=1, report=None)
+
+    assert all(r.error is None for r in results)
+    outputs = {r.output for r in results}
+    assert len(outputs) == 3
+    assert sorted(os.listdir(out_dir)) == ["x_grayscale.png", "x_grayscale_2.png", "x_grayscale_3.png"]
@@ -0,0 +1,45 @@
+"""Normalized edge output must not be scaled per strip or per band"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parallel import StripExecutor
+from pipeline import Pipeline, PipelineStep
+from tiling import process_tiled, tifffile
+
+
+def normalize_pipeline(method):
+    return Pipeline([PipelineStep("Edge Detection", {"edge_method": method,
+                                                     "edge_output": "Normalize"})])
+
+
+@pytest.fixture(scope="module")
+def image():
+    # 1.5 MP with one bright patch, so strips have very different peaks
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 64, (1000, 1500, 3), dtype=np.uint8)
+    img[100:140, 200:260] = 255
+    return img
+
+
+@pytest.mark.parametrize("method", ["Sobel", "Scharr", "Laplacian"])
+def test_strips_match_whole_image(image, method):
+    pipeline = normalize_pipeline(method)
+    executor = StripExecutor(workers=4, strip_rows=256)
+    try:
+        result = executor.run(pipeline, image)
+    finally:
+        executor.shutdown()
+    np.testing.assert_array_equal(result, pipeline.run(image))
+
+
+@pytest.mark.skipif(tifffile is None, reason="tiled processing needs tifffile")
+def test_tiled_rejects_normalize(image, tmp_path):
+    in_path = str(tmp_path / "in.tif")
+    tifffile.imwrite(in_path, image[..., ::-1])
+    with pytest.raises(ValueError, match="Normalize"):
+        process_tiled(in_path, str(tmp_path / "out.tif"), normalize_pipeline("Sobel"), 256)
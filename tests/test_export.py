@@ -0,0 +1,30 @@
+"""Export All must report every failed write, whatever its exception"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import export
+from export import ExportOptions, export_many
+
+
+def test_export_many_reports_failures(tmp_path, monkeypatch):
+    write_image = export.write_image
+
+    def flaky_write(file_path, array, options=ExportOptions()):
+        if file_path.endswith("bad.png"):
+            # Raised without a message, so str(error) is empty
+            raise RuntimeError()
+        write_image(file_path, array, options)
+
+    monkeypatch.setattr(export, "write_image", flaky_write)
+    image = np.zeros((20, 30, 3), np.uint8)
+    items = [(str(tmp_path / name), image) for name in ("good.png", "bad.png", "missing/x.png")]
+    errors = dict(export_many(items, workers=2))
+
+    assert errors[str(tmp_path / "good.png")] is None
+    assert os.path.exists(tmp_path / "good.png")
+    assert errors[str(tmp_path / "bad.png")] == "RuntimeError"
+    assert errors[str(tmp_path / "missing" / "x.png")].startswith("FileNotFoundError: ")
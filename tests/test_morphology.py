@@ -0,0 +1,40 @@
+"""The morphology engine must match cv2.morphologyEx, including its van Herk/Gil-Werman path"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import morphology
+from operations import MORPH_OPERATIONS, SHAPES
+
+
+@pytest.fixture(scope="module", params=["gray", "color"])
+def image(request):
+    rng = np.random.default_rng(1)
+    # Odd sizes, so blocks of the running extremes never line up with the borders
+    shape = (37, 53) if request.param == "gray" else (37, 53, 3)
+    return rng.integers(0, 256, shape, dtype=np.uint8)
+
+
+@pytest.mark.parametrize("vhgw_min_size", [2, morphology.VHGW_MIN_SIZE], ids=["vhgw", "opencv"])
+@pytest.mark.parametrize("iterations", [1, 2, 3])
+@pytest.mark.parametrize("kernel_size", [1, 2, 3, 4, 5, 8, 9])
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("operation", MORPH_OPERATIONS)
+def test_matches_morphology_ex(monkeypatch, image, operation, shape, kernel_size, iterations,
+                               vhgw_min_size):
+    monkeypatch.setattr(morphology, "VHGW_MIN_SIZE", vhgw_min_size)
+    expected = morphology.reference_morphology(image, operation, kernel_size, iterations, shape)
+    result = morphology.morphology(image, operation, kernel_size, iterations, shape)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_vhgw_into_preallocated_output(monkeypatch, image):
+    monkeypatch.setattr(morphology, "VHGW_MIN_SIZE", 2)
+    dst = np.empty_like(image)
+    result = morphology.morphology(image, "Closing", 4, 2, dst=dst)
+    assert result is dst
+    np.testing.assert_array_equal(dst, morphology.reference_morphology(image, "Closing", 4, 2))
@@ -0,0 +1,75 @@
+"""Strip-parallel runs must equal running the pipeline on the whole image"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel
+from parallel import StripExecutor
+from pipeline import Pipeline, PipelineStep
+
+PIPELINES = {
+    "dilate": [("Dilasi", {"morph_kernel": 5, "morph_iter": 2})],
+    "open ellipse even": [("Opening", {"morph_kernel": 4, "morph_iter": 2, "morph_shape": "Ellipse"})],
+    "close cross": [("Closing", {"morph_kernel": 7, "morph_shape": "Cross"})],
+    "sobel": [("Edge Detection", {"edge_method": "Sobel"})],
+    "scharr l1": [("Edge Detection", {"edge_method": "Scharr", "edge_magnitude": "L1"})],
+    "laplacian": [("Edge Detection", {"edge_method": "Laplacian"})],
+    "point chain": [("Gamma", {"gamma": 1.8}), ("Levels", {"levels_black": 20, "levels_white": 230}),
+                    ("Curves", {"curve_midtones": 150})],
+    "point chain to gray": [("Brightness/Contrast", {"brightness": 10, "contrast": 1.3}),
+                            ("Biner (Threshold)", {"threshold": 100})],
+    "logic mask": [("Operasi Logika", {"logic_op": "XOR"})],
+    "mixed": [("Gamma", {"gamma": 0.7}), ("Erosi", {"morph_kernel": 3}),
+              ("Edge Detection", {"edge_method": "Sobel"}), ("Dilasi", {"morph_kernel": 2})],
+}
+
+
+def make_pipeline(steps):
+    return Pipeline([PipelineStep(operation, params) for operation, params in steps])
+
+
+@pytest.fixture(scope="module", params=["gray", "color"])
+def image(request):
+    rng = np.random.default_rng(2)
+    # 301 rows: the last strip is shorter than the others
+    shape = (301, 157) if request.param == "gray" else (301, 157, 3)
+    img = rng.integers(0, 256, shape, dtype=np.uint8)
+    img[40:90, 30:70] = 255
+    return img
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    # Split even these small test images into strips
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_PIXELS", 0)
+    executor = StripExecutor(workers=3, strip_rows=64)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.parametrize("name", PIPELINES)
+def test_strips_match_whole_image(executor, image, name):
+    pipeline = make_pipeline(PIPELINES[name])
+    np.testing.assert_array_equal(executor.run(pipeline, image), pipeline.run(image))
+
+
+@pytest.mark.parametrize("name", PIPELINES)
+def test_strips_into_preallocated_output(executor, image, name):
+    pipeline = make_pipeline(PIPELINES[name])
+    out = np.empty(pipeline.output_shape(image.shape), np.uint8)
+    assert executor.run(pipeline, image, out=out) is out
+    np.testing.assert_array_equal(out, pipeline.run(image))
+
+
+def test_strip_rows_not_dividing_height(monkeypatch, image):
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_PIXELS", 0)
+    executor = StripExecutor(workers=2, strip_rows=7)
+    try:
+        pipeline = make_pipeline(PIPELINES["mixed"])
+        np.testing.assert_array_equal(executor.run(pipeline, image), pipeline.run(image))
+    finally:
+        executor.shutdown()
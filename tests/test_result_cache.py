@@ -0,0 +1,117 @@
+"""Result cache keys must be stable, and the directory must stay within its budget"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import Pipeline, PipelineStep
+from result_cache import ResultCache, file_digest, lookup, run_cached, store
+
+DIGEST = "0" * 40
+DECODING = {"decoder": "pil", "orientation": 1}
+
+
+def make_pipeline(*steps):
+    return Pipeline([PipelineStep(operation, dict(params)) for operation, params in steps])
+
+
+def result(fill, nbytes=1000):
+    return np.full(nbytes, fill, np.uint8)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache"), max_bytes=10_000)
+
+
+def test_key_is_stable(cache, tmp_path):
+    steps = [("Gamma", {"gamma": 1.5}), ("Dilasi", {"morph_kernel": 3, "morph_iter": 2})]
+    key = cache.key(DIGEST, make_pipeline(*steps), DECODING)
+    assert key == cache.key(DIGEST, make_pipeline(*steps), dict(DECODING))
+    # Parameter order does not matter, and another cache instance agrees
+    reordered = [("Gamma", {"gamma": 1.5}), ("Dilasi", {"morph_iter": 2, "morph_kernel": 3})]
+    assert key == cache.key(DIGEST, make_pipeline(*reordered), DECODING)
+    assert key == ResultCache(str(tmp_path / "other")).key(DIGEST, make_pipeline(*steps), DECODING)
+
+
+def test_key_changes_with_inputs(cache):
+    steps = [("Gamma", {"gamma": 1.5}), ("Dilasi", {"morph_kernel": 3})]
+    key = cache.key(DIGEST, make_pipeline(*steps), DECODING)
+    variants = [
+        cache.key("1" * 40, make_pipeline(*steps), DECODING),
+        cache.key(DIGEST, make_pipeline(*steps), {"decoder": "pil", "orientation": 6}),
+        cache.key(DIGEST, make_pipeline(*steps), None),
+        cache.key(DIGEST, make_pipeline(*reversed(steps)), DECODING),
+        cache.key(DIGEST, make_pipeline(("Gamma", {"gamma": 1.6}), steps[1]), DECODING),
+        cache.key(DIGEST, make_pipeline(steps[0]), DECODING),
+    ]
+    assert len({key, *variants}) == len(variants) + 1
+
+
+def test_file_digest_follows_contents(tmp_path):
+    a, b = tmp_path / "a.png", tmp_path / "b.png"
+    a.write_bytes(b"same")
+    b.write_bytes(b"same")
+    assert file_digest(str(a)) == file_digest(str(b))
+    b.write_bytes(b"changed")
+    assert file_digest(str(a)) != file_digest(str(b))
+
+
+def test_round_trip(cache):
+    array = np.arange(60, dtype=np.uint8).reshape(5, 4, 3)
+    cache.put("ab" * 20, array)
+    np.testing.assert_array_equal(cache.get("ab" * 20), array)
+    assert cache.get("cd" * 20) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_eviction_keeps_budget_and_drops_least_recent(cache):
+    keys = [f"{i:02d}" * 20 for i in range(12)]
+    for i, key in enumerate(keys[:8]):
+        cache.put(key, result(i))
+        os.utime(cache._path(key), (1 + i, 1 + i))
+    # A hit refreshes the oldest entry, so the second oldest goes first
+    assert cache.get(keys[0]) is not None
+
+    for i, key in enumerate(keys[8:], 8):
+        cache.put(key, result(i))
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.total_bytes == sum(os.path.getsize(p) for _, p, _ in cache._entries())
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[-1]) is not None
+
+
+def test_oversized_result_is_not_stored(cache):
+    cache.put("ee" * 20, result(1, nbytes=20_000))
+    assert cache.get("ee" * 20) is None
+    assert cache.total_bytes == 0
+
+
+def test_replacing_counts_the_file_once(cache):
+    cache.put("ab" * 20, result(1))
+    size = cache.total_bytes
+    cache.put("ab" * 20, result(2))
+    assert cache.total_bytes == size
+    # A reopened cache measures the directory itself
+    assert ResultCache(cache.directory, cache.max_bytes).total_bytes == size
+
+
+def test_lookup_then_store(cache, tmp_path):
+    source = tmp_path / "in.png"
+    source.write_bytes(b"pixels")
+    pipeline = make_pipeline(("Gamma", {"gamma": 2.0}))
+    key, found = lookup(cache, str(source), pipeline, DECODING)
+    assert found is None
+    store(cache, key, result(7))
+    _, found = lookup(cache, str(source), pipeline, DECODING)
+    np.testing.assert_array_equal(found, result(7))
+
+    _, hit = run_cached(cache, str(source), pipeline, lambda: pytest.fail("recomputed"), DECODING)
+    assert hit
+    # Without a cache nothing is looked up or stored
+    assert lookup(None, str(source), pipeline) == (None, None)
+    store(None, None, result(7))
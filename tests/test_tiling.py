@@ -0,0 +1,86 @@
+"""Tiled file-to-file processing must equal processing the decoded image directly"""
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loader import load_bgr
+from pipeline import Pipeline, PipelineStep
+from tiling import process_tiled, tifffile
+
+pytestmark = pytest.mark.skipif(tifffile is None, reason="tiled processing needs tifffile")
+
+TILE_SIZE = 64
+
+PIPELINES = {
+    "dilate": [("Dilasi", {"morph_kernel": 5, "morph_iter": 2})],
+    "open ellipse even": [("Opening", {"morph_kernel": 4, "morph_iter": 2, "morph_shape": "Ellipse"})],
+    "close cross": [("Closing", {"morph_kernel": 7, "morph_shape": "Cross"})],
+    "sobel": [("Edge Detection", {"edge_method": "Sobel"})],
+    "scharr l1": [("Edge Detection", {"edge_method": "Scharr", "edge_magnitude": "L1"})],
+    "laplacian": [("Edge Detection", {"edge_method": "Laplacian"})],
+    "point chain": [("Gamma", {"gamma": 1.8}), ("Levels", {"levels_black": 20, "levels_white": 230}),
+                    ("Curves", {"curve_midtones": 150})],
+    "point chain to gray": [("Brightness/Contrast", {"brightness": 10, "contrast": 1.3}),
+                            ("Biner (Threshold)", {"threshold": 100})],
+    "logic mask": [("Operasi Logika", {"logic_op": "XOR"})],
+    "mixed": [("Gamma", {"gamma": 0.7}), ("Erosi", {"morph_kernel": 3}),
+              ("Edge Detection", {"edge_method": "Sobel"}), ("Dilasi", {"morph_kernel": 2})],
+}
+
+
+def make_pipeline(steps):
+    return Pipeline([PipelineStep(operation, params) for operation, params in steps])
+
+
+@pytest.fixture(scope="module")
+def rgb():
+    rng = np.random.default_rng(3)
+    # 301 x 203: neither side is a multiple of the tile size
+    img = rng.integers(0, 256, (301, 203, 3), dtype=np.uint8)
+    img[40:90, 30:70] = 255
+    return img
+
+
+@pytest.fixture(scope="module", params=["strips", "tiles", "png"])
+def input_path(request, rgb, tmp_path_factory):
+    directory = tmp_path_factory.mktemp(request.param)
+    if request.param == "strips":
+        path = str(directory / "in.tif")
+        tifffile.imwrite(path, rgb, photometric="rgb", rowsperstrip=16)
+    elif request.param == "tiles":
+        path = str(directory / "in.tif")
+        tifffile.imwrite(path, rgb, photometric="rgb", tile=(32, 32))
+    else:
+        # Not streamable: decoded whole, processed and written band by band
+        path = str(directory / "in.png")
+        cv2.imwrite(path, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+    return path
+
+
+def read_result(path):
+    result = tifffile.imread(path)
+    return cv2.cvtColor(result, cv2.COLOR_RGB2BGR) if result.ndim == 3 else result
+
+
+@pytest.mark.parametrize("name", PIPELINES)
+def test_tiled_matches_direct(input_path, tmp_path, name):
+    pipeline = make_pipeline(PIPELINES[name])
+    out_path = str(tmp_path / "out.tif")
+    shape = process_tiled(input_path, out_path, pipeline, TILE_SIZE)
+
+    expected = pipeline.run(load_bgr(input_path))
+    assert shape == expected.shape[:2]
+    np.testing.assert_array_equal(read_result(out_path), expected)
+
+
+def test_output_is_tiled(input_path, tmp_path):
+    out_path = str(tmp_path / "out.tif")
+    process_tiled(input_path, out_path, make_pipeline(PIPELINES["dilate"]), TILE_SIZE)
+    with tifffile.TiffFile(out_path) as tif:
+        page = tif.pages[0]
+        assert page.is_tiled and (page.tilelength, page.tilewidth) == (TILE_SIZE, TILE_SIZE)
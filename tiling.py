@@ -0,0 +1,208 @@
+"""Tiled processing of images larger than memory
+
+The input is streamed top to bottom in full-width bands of ``tile_size`` rows.
+Each band is processed with enough extra rows above and below (the halo) for
+neighborhood operations to see the same pixels as on the whole image, and the
+result is written tile by tile into a tiled BigTIFF. Peak memory is a few
+bands, independent of the image height.
+
+Streaming reads and tiled writes need the optional ``tifffile`` package.
+Inputs it cannot stream (non-TIFF formats, planar or non-8-bit TIFFs) are
+decoded whole and only the processing and output are tiled.
+"""
+import itertools
+import os
+
+import cv2
+import numpy as np
+
+from loader import load_bgr
+from morphology import MORPH_OPERATIONS, morph_halo
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+DEFAULT_TILE_SIZE = 512
+
+# Canny's hysteresis follows edges across the whole image, which no finite
+# halo reproduces exactly; this covers the Sobel aperture, non-maximum
+# suppression and short edge continuations across band borders.
+CANNY_HALO = 16
+
+
+def operation_halo(choice, params):
+    """Rows of context an operation needs on each side of a band"""
+    if choice in MORPH_OPERATIONS:
+        return morph_halo(choice, int(params["morph_kernel"]), int(params["morph_iter"]))
+    if choice == "Edge Detection":
+        return CANNY_HALO if params["edge_method"] == "Canny" else 1
+    return 0
+
+
+def pipeline_halo(pipeline):
+    """Rows of context a whole pipeline needs on each side of a band"""
+    return sum(operation_halo(step.operation, step.params) for step in pipeline.steps)
+
+
+def has_normalized_step(pipeline):
+    """Whether a pipeline scales a step by the peak of the whole image
+
+    Normalized edge output divides by the largest magnitude it is given, so
+    bands or strips would each be scaled by their own peak.
+    """
+    return any(step.operation == "Edge Detection" and step.params.get("edge_method") != "Canny"
+               and step.params.get("edge_output") == "Normalize"
+               for step in pipeline.steps)
+
+
+def _rows_to_bgr(rows):
+    """Convert decoded TIFF rows (length, width, samples) to gray or BGR"""
+    samples = rows.shape[-1]
+    if samples == 1:
+        return rows[..., 0]
+    if samples == 3:
+        return cv2.cvtColor(rows, cv2.COLOR_RGB2BGR)
+    if samples == 4:
+        return cv2.cvtColor(rows, cv2.COLOR_RGBA2BGR)
+    raise ValueError(f"Unsupported number of samples: {samples}")
+
+
+class TiffStripReader:
+    """Stream the first page of a TIFF strip by strip, or tile row by tile row"""
+
+    def __init__(self, file_path):
+        if tifffile is None:
+            raise ValueError("tifffile is not installed")
+        self.tif = tifffile.TiffFile(file_path)
+        page = self.tif.pages[0]
+        if page.dtype != np.uint8 or page.imagedepth != 1:
+            self.tif.close()
+            raise ValueError("Only 8-bit 2D TIFF pages can be streamed")
+        if page.samplesperpixel > 1 and page.planarconfig != 1:
+            self.tif.close()
+            raise ValueError("Planar TIFF pages cannot be streamed")
+        self.page = page
+        self.height = page.imagelength
+        self.width = page.imagewidth
+
+    def iter_rows(self):
+        """Yield ``(y, rows)`` chunks from top to bottom"""
+        page = self.page
+        samples = page.samplesperpixel
+
+        if not page.is_tiled:
+            for segment, index, shape in page.segments():
+                if segment is None:
+                    segment = np.zeros(shape, np.uint8)
+                yield index[2], _rows_to_bgr(segment[0])
+            return
+
+        tile_height, tile_width = page.tilelength, page.tilewidth
+        band = None
+        for segment, index, shape in page.segments():
+            y, x = index[2], index[3]
+            if band is None:
+                band = np.zeros((tile_height, self.width, samples), np.uint8)
+            if segment is not None:
+                band[:, x:x + tile_width] = segment[0][:, :self.width - x]
+            if x + tile_width >= self.width:
+                yield y, _rows_to_bgr(band[:min(tile_height, self.height - y)])
+                band = None
+
+    def close(self):
+        self.tif.close()
+
+
+class WholeImageReader:
+    """Fallback reader that decodes the full image at once"""
+
+    def __init__(self, file_path):
+        self.image = load_bgr(file_path)
+        self.height, self.width = self.image.shape[:2]
+
+    def iter_rows(self):
+        yield 0, self.image
+
+    def close(self):
+        self.image = None
+
+
+def open_reader(file_path):
+    """Open the most memory-friendly reader for an image file"""
+    if os.path.splitext(file_path)[1].lower() in (".tif", ".tiff") and tifffile is not None:
+        try:
+            return TiffStripReader(file_path)
+        except ValueError:
+            pass
+    return WholeImageReader(file_path)
+
+
+def iter_processed_bands(reader, pipeline, band_height, token=None):
+    """Yield ``(y, result_rows)`` for consecutive bands of ``band_height`` rows"""
+    halo = pipeline_halo(pipeline)
+    height, width = reader.height, reader.width
+    rows_iter = reader.iter_rows()
+    chunks = []
+    loaded_end = 0
+    bands = (height + band_height - 1) // band_height
+
+    for i, y0 in enumerate(range(0, height, band_height)):
+        if token is not None:
+            token.check(f"Band {i + 1}/{bands}")
+        y1 = min(y0 + band_height, height)
+        need_start = max(0, y0 - halo)
+        need_end = min(height, y1 + halo)
+
+        while loaded_end < need_end:
+            y, rows = next(rows_iter)
+            chunks.append((y, rows))
+            loaded_end = y + rows.shape[0]
+        # Rows above the halo of this band are never needed again
+        chunks = [(y, rows) for y, rows in chunks if y + rows.shape[0] > need_start]
+
+        parts = [rows[max(need_start - y, 0):need_end - y] for y, rows in chunks if y < need_end]
+        band_in = parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+        result = pipeline.run(band_in, window=(need_start, 0, height, width))
+        yield y0, result[y0 - need_start:y1 - need_start]
+
+
+def write_tiled_tiff(out_path, bands, height, width, tile_size, compression=None):
+    """Write an iterator of ``(y, rows)`` bands into a tiled BigTIFF"""
+    if tifffile is None:
+        raise RuntimeError("Tiled TIFF output needs the tifffile package")
+
+    first = next(bands)
+    shape = (height, width) + first[1].shape[2:]
+    photometric = "rgb" if first[1].ndim == 3 else "minisblack"
+
+    def tiles():
+        for _, band in itertools.chain([first], bands):
+            if band.ndim == 3:
+                band = cv2.cvtColor(band, cv2.COLOR_BGR2RGB)
+            for x in range(0, width, tile_size):
+                yield band[:, x:x + tile_size]
+
+    with tifffile.TiffWriter(out_path, bigtiff=True) as tif:
+        tif.write(tiles(), shape=shape, dtype=np.uint8, tile=(tile_size, tile_size),
+                  photometric=photometric, compression=compression)
+
+
+def process_tiled(in_path, out_path, pipeline, tile_size=DEFAULT_TILE_SIZE,
+                  compression=None, token=None):
+    """Run a pipeline over an image band by band into a tiled TIFF"""
+    if tile_size <= 0 or tile_size % 16:
+        raise ValueError("Tile size must be a positive multiple of 16")
+    if has_normalized_step(pipeline):
+        raise ValueError("Normalized edge output needs the whole image; "
+                         "use Saturate output for tiled processing")
+
+    reader = open_reader(in_path)
+    try:
+        bands = iter_processed_bands(reader, pipeline, tile_size, token)
+        write_tiled_tiff(out_path, bands, reader.height, reader.width, tile_size, compression)
+    finally:
+        reader.close()
+    return reader.height, reader.width
@@ -1,12 +1,47 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk, ImageOps
-import cv2
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from PIL import ImageTk
+import json
 import os
 
+# OpenCV, matplotlib and the engine modules importing them are imported where
+# first used, so the window shows without paying for them at startup
+from cache import DerivedCache
+from export import ExportOptions
+from operations import (DEFAULT_PARAMS, EDGE_MAGNITUDES, EDGE_METHODS, EDGE_OUTPUTS,
+                        MORPH_OPERATIONS, OPERATIONS, SHAPES)
+from pipeline import Pipeline, PipelineStep
+from profiling import Profiler
+from profiling_panel import ProfilingPanel
+from result_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache, lookup, store
+from viewport import Viewport
+from worker import BackgroundWorker
+
+# Live preview refresh interval, roughly one frame of a 60 Hz display
+PREVIEW_INTERVAL_MS = 16
+
+# Wheel zoom factor per notch, and the redraw delay that coalesces resize events
+ZOOM_STEP = 1.25
+RESIZE_REDRAW_MS = 30
+
+# Threads per full-resolution operation (None uses every core) and rows per strip
+# (None uses parallel.DEFAULT_STRIP_ROWS)
+PARALLEL_WORKERS = None
+STRIP_ROWS = None
+
+# Larger images are histogrammed on a strided subsample
+HISTOGRAM_MAX_SAMPLES = 16_000_000
+
+# Memory kept for the full-resolution results offered by Export All
+SESSION_RESULTS_BYTES = 1024 * 1024 * 1024
+
+# Full-resolution results can also go to the on-disk result cache shared with
+# batch --cache, so reopening an image skips the computation. Off by default
+# (toggled in the sidebar): writing a full-size result costs as much as a save.
+RESULT_CACHE = False
+RESULT_CACHE_DIR = DEFAULT_CACHE_DIR
+RESULT_CACHE_MB = DEFAULT_MAX_BYTES // (1024 * 1024)
+
 class ImageProcessorApp:
     def __init__(self, root):
         self.root = root
@@ -28,12 +63,55 @@ class ImageProcessorApp:
         self.button_color = "#3498db"
         self.button_hover = "#2980b9"
         self.canvas_bg = "#ffffff"
-        
+        self.configure_styles()
+
         self.original_img = None
         self.processed_img = None
         self.original_photo = None
         self.processed_photo = None
-        self.histogram_figures = []
+        self.image_name = None
+
+        # Both canvases share one zoom and pan; each draws from its own pyramid
+        self.viewport = Viewport()
+        self.pyramids = {}
+        self.render_pending = None
+        self.pan_anchor = None
+        # Created with the first histogram, which is when matplotlib gets imported
+        self.histogram_windows = None
+
+        # Bumped on every upload so derived data of older images is never reused
+        self.image_version = 0
+        self.next_version = 0
+        self.showing_preview = False
+        self.preview_pending = False
+
+        # Decoded arrays, grayscale plane, proxies and histograms of the loaded image
+        self.derived_cache = DerivedCache()
+
+        # Full-resolution results persisted across sessions, keyed by file contents;
+        # opened on first use (see get_result_cache) and written after display
+        self.image_path = None
+        self.result_cache = None
+        self.cache_writer = None
+
+        # Heavy work runs off the Tk thread; Escape cancels it
+        self.worker = BackgroundWorker(self.root, on_progress=self.show_progress)
+        self.root.bind("<Escape>", self.cancel_jobs)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Output path of the latest tiled job, so a cancelled one never deletes its file
+        self.tiled_output = None
+
+        # Full-resolution operations split large images into strips across cores;
+        # the thread pool starts with the first of them (see get_strip_executor)
+        self.strip_executor = None
+
+        # Per-stage timings, recorded only while enabled in the profiling panel
+        self.profiler = Profiler()
+
+        # Encoder settings, and the full-resolution results of this session for Export All
+        self.export_options = ExportOptions()
+        self.export_format = "png"
+        self.session_results = DerivedCache(SESSION_RESULTS_BYTES)
 
         # Configure grid layout
         self.root.grid_columnconfigure(1, weight=1)
@@ -63,20 +141,8 @@ class ImageProcessorApp:
         tk.Label(self.sidebar, text="Select Process:", bg=self.sidebar_color, 
                 fg="white", font=("Segoe UI", 10)).pack(anchor=tk.W, pady=(20, 5))
         
-        self.options = [
-            "Grayscale",
-            "Biner (Threshold)",
-            "Brightness/Contrast",
-            "Operasi Logika",
-            "Histogram",
-            "Dilasi",
-            "Edge Detection"
-        ]
-        
-        style = ttk.Style()
-        style.theme_use('clam')
-        style.configure('TCombobox', fieldbackground=self.canvas_bg, background=self.canvas_bg)
-        
+        self.options = list(OPERATIONS)
+
         self.option_var = tk.StringVar(value=self.options[0])
         self.option_menu = ttk.Combobox(self.sidebar, textvariable=self.option_var, 
                                       values=self.options, state="readonly", 
@@ -91,6 +157,32 @@ class ImageProcessorApp:
         # Create initial parameter widgets
         self.create_parameter_widgets()
 
+        # Live preview re-runs the operation on a canvas-sized proxy as sliders move
+        self.live_preview_var = tk.BooleanVar(value=False)
+        self.live_preview_check = tk.Checkbutton(self.sidebar, text="Live Preview",
+                                                 variable=self.live_preview_var,
+                                                 bg=self.sidebar_color, fg="white",
+                                                 selectcolor=self.sidebar_color,
+                                                 activebackground=self.sidebar_color,
+                                                 activeforeground="white",
+                                                 font=("Segoe UI", 10),
+                                                 command=self.schedule_preview)
+        self.live_preview_check.pack(anchor=tk.W)
+
+        self.result_cache_var = tk.BooleanVar(value=RESULT_CACHE)
+        self.result_cache_check = tk.Checkbutton(self.sidebar, text="Cache Results on Disk",
+                                                 variable=self.result_cache_var,
+                                                 bg=self.sidebar_color, fg="white",
+                                                 selectcolor=self.sidebar_color,
+                                                 activebackground=self.sidebar_color,
+                                                 activeforeground="white",
+                                                 font=("Segoe UI", 10))
+        self.result_cache_check.pack(anchor=tk.W)
+
+        # Multi-step pipeline editor
+        self.pipeline = Pipeline()
+        self.create_pipeline_panel()
+
         # Process button with modern style
         self.process_btn = tk.Button(self.sidebar, text="Process Image", 
                                    bg="#27ae60", fg="white",
@@ -111,6 +203,27 @@ class ImageProcessorApp:
         self.save_btn.bind("<Enter>", lambda e: self.save_btn.config(bg="#d35400"))
         self.save_btn.bind("<Leave>", lambda e: self.save_btn.config(bg="#e67e22"))
 
+        export_frame = tk.Frame(self.sidebar, bg=self.sidebar_color)
+        export_frame.pack(fill=tk.X, pady=(0, 5))
+        for text, command in (("Export Options...", self.open_export_options),
+                              ("Export All...", self.export_all)):
+            btn = tk.Button(export_frame, text=text, command=command, bg=self.button_color,
+                            fg="white", relief=tk.FLAT, borderwidth=0,
+                            activebackground=self.button_hover, font=("Segoe UI", 9))
+            btn.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=1)
+            btn.bind("<Enter>", lambda e, b=btn: b.config(bg=self.button_hover))
+            btn.bind("<Leave>", lambda e, b=btn: b.config(bg=self.button_color))
+
+        # Tiled processing straight from file to file, for images larger than memory
+        self.large_file_btn = tk.Button(self.sidebar, text="Process Large File...", 
+                                      bg="#8e44ad", fg="white",
+                                      font=("Segoe UI", 10), 
+                                      relief=tk.FLAT, activebackground="#9b59b6",
+                                      command=self.process_large_file)
+        self.large_file_btn.pack(fill=tk.X, pady=5)
+        self.large_file_btn.bind("<Enter>", lambda e: self.large_file_btn.config(bg="#9b59b6"))
+        self.large_file_btn.bind("<Leave>", lambda e: self.large_file_btn.config(bg="#8e44ad"))
+
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         self.status_bar = tk.Label(self.sidebar, textvariable=self.status_var, 
@@ -162,6 +275,11 @@ class ImageProcessorApp:
                                         highlightthickness=0)
         self.processed_canvas.pack(fill=tk.BOTH, expand=True)
 
+        self.profiling_panel = ProfilingPanel(self, self.main_frame, self.profiler)
+
+        for canvas in (self.original_canvas, self.processed_canvas):
+            self.bind_view_events(canvas)
+
         # Configure grid weights
         self.canvas_frame.grid_columnconfigure(0, weight=1)
         self.canvas_frame.grid_columnconfigure(1, weight=1)
@@ -170,6 +288,12 @@ class ImageProcessorApp:
         # Add hover effects to all buttons
         self.style_buttons()
 
+    def configure_styles(self):
+        """Set up the ttk theme once, before any ttk widget is created"""
+        style = ttk.Style(self.root)
+        style.theme_use('clam')
+        style.configure('TCombobox', fieldbackground=self.canvas_bg, background=self.canvas_bg)
+
     def style_buttons(self):
         """Apply modern styling to all buttons"""
         buttons = [self.upload_btn, self.process_btn, self.save_btn]
@@ -197,19 +321,66 @@ class ImageProcessorApp:
             self.create_slider("Brightness:", -100, 100, 0, "brightness_var")
             self.create_slider("Contrast:", 0.1, 3.0, 1.0, "contrast_var", resolution=0.1)
 
+        elif current_choice == "Gamma":
+            self.create_slider("Gamma:", 0.1, 5.0, 1.0, "gamma_var", resolution=0.1)
+
+        elif current_choice == "Levels":
+            self.create_slider("Input Black:", 0, 254, 0, "levels_black_var")
+            self.create_slider("Input White:", 1, 255, 255, "levels_white_var")
+            self.create_slider("Midtone Gamma:", 0.1, 5.0, 1.0, "levels_gamma_var", resolution=0.1)
+            self.create_slider("Output Black:", 0, 255, 0, "levels_out_black_var")
+            self.create_slider("Output White:", 0, 255, 255, "levels_out_white_var")
+            self.keep_levels_ordered()
+
+        elif current_choice == "Curves":
+            self.create_slider("Shadows (64):", 0, 255, 64, "curve_shadows_var")
+            self.create_slider("Midtones (128):", 0, 255, 128, "curve_midtones_var")
+            self.create_slider("Highlights (192):", 0, 255, 192, "curve_highlights_var")
+
         elif current_choice == "Operasi Logika":
             self.create_dropdown("Operasi:", ["AND", "OR", "XOR", "NOT"], "logic_op_var")
 
-        elif current_choice == "Dilasi":
+        elif current_choice in MORPH_OPERATIONS:
+            self.create_dropdown("Kernel Shape:", list(SHAPES), "morph_shape_var")
             self.create_slider("Kernel Size:", 1, 15, 3, "morph_kernel_var")
             self.create_slider("Iterations:", 1, 10, 1, "morph_iter_var")
 
         elif current_choice == "Edge Detection":
-            self.create_dropdown("Metode:", ["Canny", "Sobel"], "edge_method_var")
-            
-            if hasattr(self, 'edge_method_var') and self.edge_method_var.get() == "Canny":
+            # Changing the method rebuilds the widgets it uses, keeping the other choices
+            method = self.current_value("edge_method_var", EDGE_METHODS[0])
+            self.create_dropdown("Metode:", list(EDGE_METHODS), "edge_method_var", method,
+                                 on_select=lambda e: self.root.after_idle(self.update_parameters))
+
+            if method == "Canny":
                 self.create_slider("Threshold 1:", 0, 500, 100, "canny_thresh1_var")
                 self.create_slider("Threshold 2:", 0, 500, 200, "canny_thresh2_var")
+            else:
+                # Canny ignores the magnitude and output settings
+                self.create_dropdown("Magnitude:", list(EDGE_MAGNITUDES), "edge_magnitude_var",
+                                     self.current_value("edge_magnitude_var", EDGE_MAGNITUDES[0]))
+                self.create_dropdown("Output:", list(EDGE_OUTPUTS), "edge_output_var",
+                                     self.current_value("edge_output_var", EDGE_OUTPUTS[0]))
+
+    def keep_levels_ordered(self):
+        """Push the other input level along so white always stays above black"""
+        black, white = self.levels_black_var, self.levels_white_var
+
+        def black_moved(*args):
+            try:
+                if white.get() <= black.get():
+                    white.set(black.get() + 1)
+            except tk.TclError:
+                pass
+
+        def white_moved(*args):
+            try:
+                if black.get() >= white.get():
+                    black.set(white.get() - 1)
+            except tk.TclError:
+                pass
+
+        black.trace_add("write", black_moved)
+        white.trace_add("write", white_moved)
 
     def create_slider(self, label_text, from_, to, default, var_name, resolution=1):
         """Helper method to create modern sliders"""
@@ -221,9 +392,20 @@ class ImageProcessorApp:
         label.pack(anchor=tk.W)
         
         var = tk.DoubleVar(value=default) if isinstance(default, float) else tk.IntVar(value=default)
+        var.trace_add("write", self.schedule_preview)
         setattr(self, var_name, var)
         
-        slider = ttk.Scale(frame, from_=from_, to=to, variable=var, 
+        # ttk.Scale has no resolution of its own; snapping keeps values (and the
+        # lookup tables cached per value) to the slider's steps while scrubbing
+        def snap(value):
+            snapped = round(round(float(value) / resolution) * resolution, 6)
+            if isinstance(var, tk.IntVar):
+                snapped = int(snapped)
+            # The variable holds the raw scale value here; IntVar.get() would truncate it
+            if float(value) != snapped:
+                var.set(snapped)
+
+        slider = ttk.Scale(frame, from_=from_, to=to, variable=var, command=snap,
                           orient=tk.HORIZONTAL, style="Horizontal.TScale")
         slider.pack(fill=tk.X)
         
@@ -232,7 +414,12 @@ class ImageProcessorApp:
                              fg="white", font=("Segoe UI", 8))
         value_label.pack(anchor=tk.E)
 
-    def create_dropdown(self, label_text, options, var_name):
+    def current_value(self, var_name, default):
+        """Value of a parameter variable from earlier widgets, or ``default``"""
+        var = getattr(self, var_name, None)
+        return var.get() if var is not None else default
+
+    def create_dropdown(self, label_text, options, var_name, default=None, on_select=None):
         """Helper method to create modern dropdowns"""
         frame = tk.Frame(self.param_frame, bg=self.sidebar_color)
         frame.pack(fill=tk.X, pady=5)
@@ -241,19 +428,20 @@ class ImageProcessorApp:
                         fg="white", font=("Segoe UI", 9))
         label.pack(anchor=tk.W)
         
-        var = tk.StringVar(value=options[0])
+        var = tk.StringVar(value=options[0] if default is None else default)
+        var.trace_add("write", self.schedule_preview)
         setattr(self, var_name, var)
-        
-        style = ttk.Style()
-        style.configure('TCombobox', fieldbackground="white", background="white")
-        
+
         dropdown = ttk.Combobox(frame, textvariable=var, values=options, 
                                state="readonly", font=("Segoe UI", 9))
         dropdown.pack(fill=tk.X)
+        if on_select is not None:
+            dropdown.bind("<<ComboboxSelected>>", on_select)
 
     def update_parameters(self, event=None):
         """Update parameter widgets when process selection changes"""
         self.create_parameter_widgets()
+        self.schedule_preview()
 
     def upload_image(self):
         """Upload image from file system"""
@@ -262,139 +450,620 @@ class ImageProcessorApp:
         )
         
         if file_path:
-            try:
-                self.original_img = Image.open(file_path)
-                self.display_image(self.original_img, self.original_canvas)
+            # Results of the previous image are stale now
+            self.worker.cancel("process")
+            self.worker.cancel("preview")
+            self.worker.cancel("histogram")
+            self.next_version += 1
+            version = self.next_version
+            cache = self.derived_cache
+            view_size = self.canvas_size(self.original_canvas)
+            profiler = self.profiler
+
+            def job(token):
+                from display import ImagePyramid
+                from loader import ImageSource
+
+                token.check("Reading header")
+                with profiler.stage("upload: read header"):
+                    # Uncompressed TIFF: map the pixels instead of decoding and copying them
+                    source = ImageSource(file_path, map_pixels=True)
+                token.check("Decoding")
+                with profiler.stage("upload: decode") as span:
+                    # JPEGs are only decoded at the resolution the canvas needs;
+                    # the full resolution waits for an operation, a save or a zoom
+                    view = span.output(source.preview(view_size))
+                full_resolution = view.shape[1] == source.width
+                if full_resolution:
+                    cache.put(version, "bgr", view)
+                    if view.ndim == 2:
+                        cache.put(version, "gray", view)
+                token.check("Building display levels")
+                with profiler.stage("upload: display levels") as span:
+                    pyramid = cache.get(version, "pyramid", span.counted(
+                        lambda: ImagePyramid(view, shared_base=full_resolution)))
+                return source, pyramid
+
+            def done(result):
+                self.original_img, pyramid = result
+                self.derived_cache.invalidate(self.image_version)
+                self.image_version = version
+                self.viewport.reset()
+                self.show_on_canvas(self.original_canvas, pyramid)
                 self.processed_img = None
-                self.processed_canvas.delete("all")
-                self.status_var.set(f"Loaded: {os.path.basename(file_path)}")
-            except Exception as e:
+                self.showing_preview = False
+                self.show_on_canvas(self.processed_canvas, None)
+                self.image_path = file_path
+                self.image_name = os.path.basename(file_path)
+                self.status_var.set(f"Loaded: {self.image_name}")
+
+            def failed(e):
+                cache.invalidate(version)
                 messagebox.showerror("Error", f"Failed to load image: {str(e)}")
                 self.status_var.set("Error loading image")
 
-    def display_image(self, img, canvas):
-        """Display image on canvas"""
-        canvas.delete("all")
-        
-        # Get canvas dimensions
+            def cancelled():
+                # A superseded upload may already have cached its decoded pixels
+                cache.invalidate(version)
+
+            self.worker.submit("load", f"Loading {os.path.basename(file_path)}", job, done, failed,
+                               cancelled)
+
+    def is_stale(self, version):
+        """Whether the image a job ran on was replaced meanwhile
+
+        What a stale job cached for its image is dropped, since nothing reads it again.
+        """
+        if version == self.image_version:
+            return False
+        self.derived_cache.invalidate(version)
+        return True
+
+    def canvas_size(self, canvas):
+        """Current drawable size of a canvas"""
         canvas_width = canvas.winfo_width() - 4
         canvas_height = canvas.winfo_height() - 4
         
         if canvas_width <= 1 or canvas_height <= 1:
             canvas_width = 500
             canvas_height = 400
-        
-        # Calculate aspect ratio preserving dimensions
-        img_ratio = img.width / img.height
-        canvas_ratio = canvas_width / canvas_height
-        
-        if img_ratio > canvas_ratio:
-            new_width = canvas_width
-            new_height = int(canvas_width / img_ratio)
-        else:
-            new_height = canvas_height
-            new_width = int(canvas_height * img_ratio)
-        
-        # Resize and display image
-        display_img = img.resize((new_width, new_height), Image.LANCZOS)
-        photo = ImageTk.PhotoImage(display_img)
+        return canvas_width, canvas_height
+
+    def show_on_canvas(self, canvas, pyramid):
+        """Make ``pyramid`` the image of a canvas (None clears it) and draw it"""
+        self.pyramids[canvas] = pyramid
+        self.render_canvas(canvas)
+
+    def render_canvas(self, canvas):
+        """Draw the visible part of a canvas's image at the current zoom and pan"""
+        canvas.delete("all")
+        pyramid = self.pyramids.get(canvas)
+        if pyramid is None:
+            return
+        size = self.canvas_size(canvas)
+        with self.profiler.stage("display: resample") as span:
+            view, (x, y) = pyramid.render(size, self.viewport.zoom, self.viewport.center)
+            span.output(view)
+        with self.profiler.stage("display: PhotoImage") as span:
+            photo = ImageTk.PhotoImage(view)
+            # Tk keeps photo pixels as 32-bit RGBA
+            span.output(photo, photo.width() * photo.height() * 4)
         
         if canvas == self.original_canvas:
             self.original_photo = photo
         else:
             self.processed_photo = photo
         
-        canvas.create_image(canvas_width//2, canvas_height//2, anchor=tk.CENTER, image=photo)
-        canvas.config(scrollregion=canvas.bbox(tk.ALL))
+        # canvas_size leaves a 2 pixel margin on every side
+        canvas.create_image(int(x) + 2, int(y) + 2, anchor=tk.NW, image=photo)
         canvas.image = photo
 
-    def process_image(self):
-        """Process image based on user selection"""
+    def schedule_render(self, delay_ms=0):
+        """Redraw both canvases once, after pending events are handled"""
+        if self.render_pending is not None:
+            self.root.after_cancel(self.render_pending)
+        self.render_pending = self.root.after(delay_ms, self.render_all)
+
+    def render_all(self):
+        self.render_pending = None
+        self.render_canvas(self.original_canvas)
+        self.render_canvas(self.processed_canvas)
+
+    def bind_view_events(self, canvas):
+        """Wheel zoom, drag pan, double-click reset and resize redraw on a canvas"""
+        canvas.bind("<MouseWheel>", lambda e: self.zoom_view(canvas, e, 1 if e.delta > 0 else -1))
+        canvas.bind("<Button-4>", lambda e: self.zoom_view(canvas, e, 1))
+        canvas.bind("<Button-5>", lambda e: self.zoom_view(canvas, e, -1))
+        canvas.bind("<ButtonPress-1>", self.start_pan)
+        canvas.bind("<B1-Motion>", lambda e: self.pan_view(canvas, e))
+        canvas.bind("<Double-Button-1>", self.reset_view)
+        # Only the visible region is resampled, so redrawing after a resize is cheap
+        canvas.bind("<Configure>", lambda e: self.schedule_render(RESIZE_REDRAW_MS))
+
+    def zoom_view(self, canvas, event, direction):
+        pyramid = self.pyramids.get(canvas)
+        if pyramid is None:
+            return
+        factor = ZOOM_STEP if direction > 0 else 1 / ZOOM_STEP
+        self.viewport.zoom_at(factor, (event.x - 2, event.y - 2), self.canvas_size(canvas), pyramid)
+        self.schedule_render()
+        self.load_full_view()
+
+    def load_full_view(self):
+        """Replace a reduced-resolution original once the zoom magnifies its pixels"""
+        source = self.original_img
+        pyramid = self.pyramids.get(self.original_canvas)
+        if (source is None or pyramid is None or pyramid.width >= source.width
+                or pyramid.fit_scale(self.canvas_size(self.original_canvas)) * self.viewport.zoom <= 1
+                or self.worker.busy("full")):
+            return
+        version = self.image_version
+        cache = self.derived_cache
+        profiler = self.profiler
+
+        def job(token):
+            from display import ImagePyramid
+
+            token.check("Decoding full resolution")
+            with profiler.stage("upload: full decode") as span:
+                cv_img = cache.get(version, "bgr", span.counted(source.full))
+            token.check("Building display levels")
+            with profiler.stage("upload: display levels") as span:
+                pyramid = span.output(ImagePyramid(cv_img, shared_base=True))
+            cache.put(version, "pyramid", pyramid)
+            return pyramid
+
+        def done(pyramid):
+            if not self.is_stale(version):
+                self.show_on_canvas(self.original_canvas, pyramid)
+
+        self.worker.submit("full", "Full resolution", job, done, self.processing_failed)
+
+    def start_pan(self, event):
+        self.pan_anchor = (event.x, event.y)
+
+    def pan_view(self, canvas, event):
+        pyramid = self.pyramids.get(canvas)
+        if pyramid is None or self.pan_anchor is None:
+            return
+        dx, dy = event.x - self.pan_anchor[0], event.y - self.pan_anchor[1]
+        self.pan_anchor = (event.x, event.y)
+        self.viewport.pan(dx, dy, self.canvas_size(canvas), pyramid)
+        self.schedule_render()
+
+    def reset_view(self, event=None):
+        """Show the whole image again"""
+        self.viewport.reset()
+        self.schedule_render()
+
+    def collect_params(self, choice):
+        """Read the parameter widgets of an operation into a dict"""
+        params = {}
+        for name, default in DEFAULT_PARAMS[choice].items():
+            var = getattr(self, name + "_var", None)
+            params[name] = var.get() if var is not None else default
+        return params
+
+    def process_image(self, then=None):
+        """Process image based on user selection
+
+        ``then`` is called on the Tk thread once the full-resolution result is shown.
+        """
         if self.original_img is None:
             messagebox.showerror("Error", "Please upload an image first!")
             return
 
+        from display import ImagePyramid
+        from histogram import compute_histogram
+        from processing import to_gray
+
+        # Everything the job needs is read here, on the Tk thread
+        source = self.original_img
+        choice = self.option_var.get()
+        params = self.collect_params(choice)
+        version = self.image_version
+        cache = self.derived_cache
+        result_cache, image_path = self.get_result_cache(), self.image_path
+        profiler = self.profiler
+
+        def source_arrays():
+            with profiler.stage("process: decode") as span:
+                cv_img = cache.get(version, "bgr", span.counted(source.full))
+            with profiler.stage("process: to gray") as span:
+                gray = cache.get(version, "gray", span.counted(lambda: to_gray(cv_img)))
+            return cv_img, gray
+
+        if choice == "Histogram":
+            def hist_job(token):
+                token.check("Converting")
+                cv_img, gray = source_arrays()
+                token.check("Computing histogram")
+                with profiler.stage("histogram: compute") as span:
+                    histogram = cache.get(version, "histograms", span.counted(lambda: compute_histogram(
+                        cv_img, gray, max_samples=HISTOGRAM_MAX_SAMPLES)))
+                # Pay for importing matplotlib here rather than on the Tk thread
+                import histogram_window  # noqa: F401
+                return histogram
+
+            def hist_done(histogram):
+                if not self.is_stale(version):
+                    self.show_histogram(histogram)
+
+            self.worker.submit("histogram", "Histogram", hist_job, hist_done, self.processing_failed)
+            return
+
+        step = Pipeline([PipelineStep(choice, params)])
+        executor = self.get_strip_executor()
+
+        def compute(token):
+            token.check("Converting")
+            cv_img, gray = source_arrays()
+            token.check(choice)
+            with profiler.stage(f"process: {choice}") as span:
+                return span.output(executor.run(step, cv_img, gray, token))
+
+        def job(token):
+            token.check("Checking result cache")
+            key, processed = lookup(result_cache, image_path, step, source.decoding)
+            hit = processed is not None
+            if not hit:
+                processed = compute(token)
+            token.check("Building display levels")
+            with profiler.stage("process: display levels") as span:
+                pyramid = span.output(ImagePyramid(processed))
+            return processed, pyramid, key, hit
+
+        def done(result):
+            if self.is_stale(version):
+                return
+            processed, pyramid, key, hit = result
+            self.show_result(processed, pyramid, f"Processed: {choice}", hit, step, image_path)
+            if not hit:
+                self.cache_result(result_cache, key, processed)
+            if then:
+                then()
+
+        # A full-resolution commit supersedes any pending preview
+        self.worker.cancel("preview")
+        self.worker.submit("process", choice, job, done, self.processing_failed)
+
+    def show_result(self, processed, pyramid, status, cache_hit=False, pipeline=None, image_path=None):
+        """Show a full-resolution result array on the processed canvas
+
+        Results of ``pipeline`` on the file ``image_path`` are kept for Export All.
+        """
+        self.processed_img = processed
+        self.showing_preview = False
+        if pipeline is not None and image_path is not None:
+            steps = json.dumps([step.to_dict() for step in pipeline.steps], sort_keys=True)
+            self.session_results.put(image_path, steps, (image_path, pipeline, processed))
+        self.show_on_canvas(self.processed_canvas, pyramid)
+        if self.result_cache is not None and self.result_cache_var.get():
+            status += f" ({'cached' if cache_hit else 'computed'}; {self.result_cache.describe()})"
+        self.status_var.set(status)
+
+    def schedule_preview(self, *args):
+        """Request a live preview, throttled to the display refresh rate"""
+        if not self.live_preview_var.get() or self.preview_pending:
+            return
+        self.preview_pending = True
+        self.root.after(PREVIEW_INTERVAL_MS, self.run_preview)
+
+    def run_preview(self):
+        """Run the current operation on the display-sized proxy of the original"""
+        self.preview_pending = False
+        choice = self.option_var.get()
+        if self.original_img is None or choice == "Histogram" or not self.live_preview_var.get():
+            return
+
+        try:
+            params = self.collect_params(choice)
+        except tk.TclError:
+            # A slider is mid-edit and holds no valid number yet
+            return
+
+        from display import ImagePyramid
+        from processing import apply_operation, to_gray
+
+        source = self.original_img
+        size = self.canvas_size(self.processed_canvas)
+        version = self.image_version
+        cache = self.derived_cache
+        profiler = self.profiler
+
+        def job(token):
+            token.check("Building proxy")
+            with profiler.stage("preview: proxy") as span:
+                pyramid = cache.get(version, "pyramid", lambda: ImagePyramid(source.preview(size)))
+                proxy_bgr = cache.get(version, ("proxy", size), span.counted(lambda: pyramid.fit(size)))
+                proxy_gray = cache.get(version, ("proxy_gray", size), lambda: to_gray(proxy_bgr))
+            token.check(choice)
+            with profiler.stage(f"preview: {choice}") as span:
+                processed = span.output(apply_operation(proxy_bgr, choice, params, proxy_gray))
+            with profiler.stage("preview: display levels") as span:
+                return span.output(ImagePyramid(processed))
+
+        def done(pyramid):
+            if self.is_stale(version):
+                return
+            self.showing_preview = True
+            self.show_on_canvas(self.processed_canvas, pyramid)
+            self.status_var.set(f"Preview: {choice}")
+
+        self.worker.submit("preview", "Preview", job, done, self.preview_failed)
+
+    def create_pipeline_panel(self):
+        """Create the pipeline step list and its buttons"""
+        tk.Label(self.sidebar, text="Pipeline:", bg=self.sidebar_color,
+                fg="white", font=("Segoe UI", 10)).pack(anchor=tk.W, pady=(15, 5))
+
+        self.pipeline_list = tk.Listbox(self.sidebar, height=5, font=("Segoe UI", 9),
+                                        activestyle="none", highlightthickness=0,
+                                        selectbackground=self.accent_color)
+        self.pipeline_list.pack(fill=tk.X)
+
+        rows = [
+            [("Add", self.add_pipeline_step), ("Remove", self.remove_pipeline_step),
+             ("\u25b2", lambda: self.move_pipeline_step(-1)),
+             ("\u25bc", lambda: self.move_pipeline_step(1))],
+            [("Load", self.load_pipeline), ("Save", self.save_pipeline),
+             ("Run", self.run_pipeline)],
+        ]
+        for row in rows:
+            frame = tk.Frame(self.sidebar, bg=self.sidebar_color)
+            frame.pack(fill=tk.X, pady=(4, 0))
+            for text, command in row:
+                btn = tk.Button(frame, text=text, command=command, bg=self.button_color,
+                                fg="white", relief=tk.FLAT, borderwidth=0,
+                                activebackground=self.button_hover, font=("Segoe UI", 9))
+                btn.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=1)
+                btn.bind("<Enter>", lambda e, b=btn: b.config(bg=self.button_hover))
+                btn.bind("<Leave>", lambda e, b=btn: b.config(bg=self.button_color))
+
+    def refresh_pipeline_list(self, selected=None):
+        """Redraw the pipeline step list"""
+        self.pipeline_list.delete(0, tk.END)
+        for i, step in enumerate(self.pipeline.steps, 1):
+            self.pipeline_list.insert(tk.END, f"{i}. {step.describe()}")
+        if selected is not None and self.pipeline.steps:
+            self.pipeline_list.selection_set(selected)
+
+    def selected_pipeline_step(self):
+        """Index of the selected pipeline step, or None"""
+        selection = self.pipeline_list.curselection()
+        return selection[0] if selection else None
+
+    def add_pipeline_step(self):
+        """Append the current operation and its parameters to the pipeline"""
+        choice = self.option_var.get()
         try:
-            cv_img = cv2.cvtColor(np.array(self.original_img), cv2.COLOR_RGB2BGR)
+            self.pipeline.add(choice, self.collect_params(choice))
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.refresh_pipeline_list(len(self.pipeline) - 1)
+
+    def remove_pipeline_step(self):
+        """Remove the selected pipeline step"""
+        index = self.selected_pipeline_step()
+        if index is not None:
+            self.pipeline.remove(index)
+            self.refresh_pipeline_list(min(index, len(self.pipeline) - 1))
+
+    def move_pipeline_step(self, offset):
+        """Move the selected pipeline step up or down"""
+        index = self.selected_pipeline_step()
+        if index is not None:
+            self.refresh_pipeline_list(self.pipeline.move(index, offset))
+
+    def save_pipeline(self):
+        """Save the pipeline as JSON"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Pipeline", "*.json"), ("All files", "*.*")],
+            title="Save Pipeline"
+        )
+        if file_path:
+            try:
+                self.pipeline.save(file_path)
+                self.status_var.set(f"Pipeline saved to {os.path.basename(file_path)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save pipeline: {str(e)}")
+
+    def load_pipeline(self):
+        """Load a pipeline from JSON"""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Pipeline", "*.json"), ("All files", "*.*")]
+        )
+        if file_path:
+            try:
+                self.pipeline = Pipeline.load(file_path)
+                self.refresh_pipeline_list()
+                self.status_var.set(f"Pipeline loaded: {os.path.basename(file_path)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load pipeline: {str(e)}")
+
+    def run_pipeline(self):
+        """Run every pipeline step on the original image"""
+        if self.original_img is None:
+            messagebox.showerror("Error", "Please upload an image first!")
+            return
+        if not self.pipeline.steps:
+            messagebox.showerror("Error", "The pipeline has no steps!")
+            return
+
+        from display import ImagePyramid
+        from processing import to_gray
+
+        # Snapshot the steps so edits while running do not affect this run
+        pipeline = Pipeline(self.pipeline.steps)
+        executor = self.get_strip_executor()
+        source = self.original_img
+        version = self.image_version
+        cache = self.derived_cache
+        result_cache, image_path = self.get_result_cache(), self.image_path
+        profiler = self.profiler
+
+        def compute(token):
+            token.check("Converting")
+            with profiler.stage("process: decode") as span:
+                cv_img = cache.get(version, "bgr", span.counted(source.full))
+            with profiler.stage("process: to gray") as span:
+                gray = cache.get(version, "gray", span.counted(lambda: to_gray(cv_img)))
+            with profiler.stage("process: pipeline") as span:
+                return span.output(executor.run(pipeline, cv_img, gray, token))
+
+        def job(token):
+            token.check("Checking result cache")
+            key, processed = lookup(result_cache, image_path, pipeline, source.decoding)
+            hit = processed is not None
+            if not hit:
+                processed = compute(token)
+            token.check("Building display levels")
+            with profiler.stage("process: display levels") as span:
+                pyramid = span.output(ImagePyramid(processed))
+            return processed, pyramid, key, hit
+
+        def done(result):
+            if self.is_stale(version):
+                return
+            processed, pyramid, key, hit = result
+            self.show_result(processed, pyramid, f"Processed: pipeline of {len(pipeline)} steps", hit,
+                             pipeline, image_path)
+            if not hit:
+                self.cache_result(result_cache, key, processed)
+
+        self.worker.cancel("preview")
+        self.worker.submit("process", "Pipeline", job, done, self.processing_failed)
+
+    def process_large_file(self):
+        """Run the pipeline (or the current operation) tile by tile from file to file"""
+        if self.pipeline.steps:
+            pipeline = Pipeline(self.pipeline.steps)
+        else:
             choice = self.option_var.get()
-            processed = None
-
-            if choice == "Grayscale":
-                gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-                processed = gray
-
-            elif choice == "Biner (Threshold)":
-                gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-                threshold = getattr(self, "threshold_var").get()
-                _, binary = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY)
-                processed = binary
-
-            elif choice == "Brightness/Contrast":
-                brightness = getattr(self, "brightness_var").get()
-                contrast = getattr(self, "contrast_var").get()
-                processed = cv2.convertScaleAbs(cv_img, alpha=contrast, beta=brightness)
-
-            elif choice == "Operasi Logika":
-                gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-                operation = getattr(self, "logic_op_var").get()
-                
-                mask = np.zeros_like(gray)
-                cv2.circle(mask, (gray.shape[1]//2, gray.shape[0]//2), 
-                          min(gray.shape)//3, 255, -1)
-                
-                if operation == "AND":
-                    processed = cv2.bitwise_and(gray, mask)
-                elif operation == "OR":
-                    processed = cv2.bitwise_or(gray, mask)
-                elif operation == "XOR":
-                    processed = cv2.bitwise_xor(gray, mask)
-                elif operation == "NOT":
-                    processed = cv2.bitwise_not(gray)
-
-            elif choice == "Histogram":
-                self.show_histogram(cv_img)
+            try:
+                pipeline = Pipeline([PipelineStep(choice, self.collect_params(choice))])
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
                 return
 
-            elif choice == "Dilasi":
-                kernel_size = getattr(self, "morph_kernel_var").get()
-                iterations = getattr(self, "morph_iter_var").get()
-                
-                gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-                kernel = np.ones((kernel_size, kernel_size), np.uint8)
-                processed = cv2.dilate(gray, kernel, iterations=iterations)
-
-            elif choice == "Edge Detection":
-                method = getattr(self, "edge_method_var").get()
-                gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-                
-                if method == "Canny":
-                    threshold1 = getattr(self, "canny_thresh1_var").get()
-                    threshold2 = getattr(self, "canny_thresh2_var").get()
-                    processed = cv2.Canny(gray, threshold1, threshold2)
-                elif method == "Sobel":
-                    sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-                    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-                    processed = cv2.magnitude(sobelx, sobely)
-                    processed = np.uint8(processed)
-
-            # Convert result to displayable format
-            if processed is not None:
-                if len(processed.shape) == 2:
-                    img_to_show = Image.fromarray(processed)
-                else:
-                    img_rgb = cv2.cvtColor(processed, cv2.COLOR_BGR2RGB)
-                    img_to_show = Image.fromarray(img_rgb)
-                
-                self.processed_img = img_to_show
-                self.display_image(img_to_show, self.processed_canvas)
-                self.status_var.set(f"Processed: {choice}")
+        in_path = filedialog.askopenfilename(
+            filetypes=[("Image files", "*.tif *.tiff *.jpg *.jpeg *.png *.bmp"), ("All files", "*.*")],
+            title="Select Large Image"
+        )
+        if not in_path:
+            return
+        out_path = filedialog.asksaveasfilename(
+            defaultextension=".tif",
+            filetypes=[("Tiled TIFF", "*.tif *.tiff")],
+            title="Save Tiled Result"
+        )
+        if not out_path:
+            return
+
+        started = False
+        request = self.tiled_output = (object(), os.path.normcase(os.path.abspath(out_path)))
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error processing image: {str(e)}")
-            self.status_var.set("Processing error")
+        def job(token):
+            nonlocal started
+            from tiling import process_tiled
+
+            started = True
+            return process_tiled(in_path, out_path, pipeline, token=token)
+
+        def done(shape):
+            self.status_var.set(f"Tiled result ({shape[1]}x{shape[0]}) saved to {os.path.basename(out_path)}")
+
+        def cancelled():
+            # A job superseded while queued never opened the output, which may be an
+            # older file; a newer job may already be writing the same path
+            if started and (self.tiled_output is request or self.tiled_output[1] != request[1]):
+                try:
+                    os.remove(out_path)
+                except OSError:
+                    pass
+            self.status_var.set(f"Tiling {os.path.basename(in_path)} cancelled; no output written")
+
+        self.worker.submit("tiled", f"Tiling {os.path.basename(in_path)}", job, done,
+                           self.processing_failed, cancelled)
+
+    def processing_failed(self, e):
+        """Report an error raised by a background processing job"""
+        messagebox.showerror("Error", f"Error processing image: {str(e)}")
+        self.status_var.set("Processing error")
+
+    def preview_failed(self, e):
+        """Report a preview error without interrupting the slider being dragged"""
+        self.status_var.set(f"Preview error: {e}")
+
+    def show_progress(self, jobs):
+        """Show running background jobs and their elapsed time in the status bar"""
+        if jobs:
+            self.status_var.set("  |  ".join(
+                f"{token.label}: {token.stage} ({elapsed:.1f}s)" if token.stage != token.label
+                else f"{token.label} ({elapsed:.1f}s)"
+                for token, elapsed in jobs))
+
+    def get_strip_executor(self):
+        """Strip executor of full-resolution operations, started on first use"""
+        if self.strip_executor is None:
+            from parallel import DEFAULT_STRIP_ROWS, StripExecutor
+            self.strip_executor = StripExecutor(PARALLEL_WORKERS, STRIP_ROWS or DEFAULT_STRIP_ROWS)
+        return self.strip_executor
+
+    def get_result_cache(self):
+        """On-disk result cache if enabled in the sidebar, opened on first use"""
+        if not self.result_cache_var.get():
+            return None
+        if self.result_cache is None:
+            try:
+                self.result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MB * 1024 * 1024)
+            except OSError as e:
+                self.result_cache_var.set(False)
+                self.status_var.set(f"Result cache unavailable: {e}")
+        return self.result_cache
+
+    def cache_result(self, cache, key, result):
+        """Write a computed result to the result cache after it is shown
+
+        Writes run one at a time on their own thread, so they never delay
+        the display or queue behind other jobs.
+        """
+        if key is None:
+            return
+        if self.cache_writer is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.cache_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-cache")
+        self.cache_writer.submit(store, cache, key, result)
+
+    def on_close(self):
+        """Stop background work and release histogram figures before exiting"""
+        self.worker.shutdown()
+        if self.strip_executor is not None:
+            self.strip_executor.shutdown()
+        if self.cache_writer is not None:
+            # A write in progress finishes (results are renamed into place); queued ones are dropped
+            self.cache_writer.shutdown(wait=False, cancel_futures=True)
+        if self.histogram_windows is not None:
+            self.histogram_windows.close_all()
+        self.root.destroy()
+
+    def cancel_jobs(self, event=None):
+        """Cancel running background jobs; saves already started still complete"""
+        channels = [channel for channel in self.worker.channels() if not channel.startswith("save:")]
+        for channel in channels:
+            self.worker.cancel(channel)
+        if channels:
+            self.status_var.set("Cancelled")
 
     def save_image(self):
         """Save the processed image to a file"""
+        if self.showing_preview and self.original_img is not None:
+            # The canvas only shows a preview; render full resolution before saving
+            self.process_image(then=self.save_image)
+            return
+
         if self.processed_img is None:
             messagebox.showerror("Error", "No processed image to save!")
             return
@@ -404,6 +1073,7 @@ class ImageProcessorApp:
             ("PNG", "*.png"),
             ("BMP", "*.bmp"),
             ("TIFF", "*.tiff"),
+            ("NumPy array", "*.npy"),
             ("All files", "*.*")
         ]
 
@@ -413,100 +1083,100 @@ class ImageProcessorApp:
             title="Save Processed Image"
         )
 
-        if file_path:
-            try:
-                # Get the file extension
-                ext = os.path.splitext(file_path)[1].lower()
-                
-                # Convert to RGB if saving as JPEG
-                if ext in ('.jpg', '.jpeg'):
-                    if self.processed_img.mode != 'RGB':
-                        save_img = self.processed_img.convert('RGB')
-                    else:
-                        save_img = self.processed_img
-                else:
-                    save_img = self.processed_img
-                
-                save_img.save(file_path)
-                self.status_var.set(f"Image saved to {os.path.basename(file_path)}")
-                messagebox.showinfo("Success", "Image saved successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to save image: {str(e)}")
-                self.status_var.set("Error saving image")
+        if not file_path:
+            return
 
-    def show_histogram(self, cv_img):
-        """Show image histogram in a modern dialog"""
-        try:
-            # Validate image dimensions
-            if cv_img is None or len(cv_img.shape) < 2:
-                messagebox.showerror("Error", "Invalid image for histogram.")
-                return
+        processed = self.processed_img
+        options = self.export_options
+        profiler = self.profiler
+        name = os.path.basename(file_path)
 
-            # Use a valid matplotlib style
-            plt.style.use('ggplot')  # Ganti 'seaborn' dengan 'ggplot' atau style lain yang tersedia
-            fig = plt.figure(figsize=(10, 6), facecolor='#f5f5f5')
-            
-            # Color histogram (RGB)
-            ax1 = fig.add_subplot(211)
-            color = ('b', 'g', 'r')
-            for i, col in enumerate(color):
-                hist = cv2.calcHist([cv_img], [i], None, [256], [0, 256])
-                ax1.plot(hist, color=col, label=col.upper())
-            ax1.set_title("Color Histogram (RGB)", fontsize=12)
-            ax1.set_xlabel("Intensity Value", fontsize=10)
-            ax1.set_ylabel("Pixel Count", fontsize=10)
-            ax1.legend()
-            ax1.grid(True, linestyle='--', alpha=0.5)
-            
-            # Grayscale histogram
-            ax2 = fig.add_subplot(212)
-            gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-            hist_gray = cv2.calcHist([gray], [0], None, [256], [0, 256])
-            ax2.plot(hist_gray, color='black', label='Grayscale')
-            ax2.set_title("Grayscale Histogram", fontsize=12)
-            ax2.set_xlabel("Intensity Value", fontsize=10)
-            ax2.set_ylabel("Pixel Count", fontsize=10)
-            ax2.legend()
-            ax2.grid(True, linestyle='--', alpha=0.5)
-            
-            plt.tight_layout()
-            
-            # Create modern histogram window
-            hist_win = tk.Toplevel(self.root)
-            hist_win.title("Image Histogram")
-            hist_win.geometry("800x600")
-            hist_win.configure(bg=self.bg_color)
-            
-            # Add canvas for figure
-            canvas = FigureCanvasTkAgg(fig, master=hist_win)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-            
-            # Add close button
-            close_btn = tk.Button(hist_win, text="Close", command=hist_win.destroy,
-                                bg=self.button_color, fg="white", relief=tk.FLAT,
-                                font=("Segoe UI", 10))
-            close_btn.pack(pady=(0, 15))
-            close_btn.bind("<Enter>", lambda e: close_btn.config(bg=self.button_hover))
-            close_btn.bind("<Leave>", lambda e: close_btn.config(bg=self.button_color))
-            
-            self.histogram_figures.append(fig)
-            
+        def job(token):
+            from export import write_image
+
+            token.check("Encoding")
+            # Encoded straight from the result array, off the Tk thread
+            with profiler.stage("save: encode") as span:
+                write_image(file_path, processed, options)
+                span.output(file_path, os.path.getsize(file_path))
+
+        def done(result):
+            self.status_var.set(f"Image saved to {name}")
+            messagebox.showinfo("Success", "Image saved successfully!")
+
+        def failed(e):
+            messagebox.showerror("Error", f"Failed to save image: {str(e)}")
+            self.status_var.set("Error saving image")
+
+        def cancelled():
+            self.status_var.set(f"Save to {name} replaced by a newer save")
+
+        # One channel per file: a save never cancels a save of another file
+        self.worker.submit(f"save:{file_path}", f"Saving {name}", job, done, failed, cancelled)
+
+    def open_export_options(self):
+        """Edit the encoder settings of saves and exports"""
+        from export_dialog import ExportOptionsDialog
+        ExportOptionsDialog(self)
+
+    def export_all(self):
+        """Write every full-resolution result of this session into a folder, concurrently"""
+        results = self.session_results.values()
+        if not results:
+            messagebox.showerror("Error", "No processed results to export!")
+            return
+
+        out_dir = filedialog.askdirectory(title="Export All Results")
+        if not out_dir:
+            return
+
+        from export import export_many, output_path, unique_path
+
+        items = []
+        paths = set()
+        for source_path, pipeline, processed in results:
+            path = unique_path(output_path(source_path, out_dir, pipeline, self.export_format), paths)
+            items.append((path, processed))
+
+        options = self.export_options
+        profiler = self.profiler
+
+        def job(token):
+            token.check(f"0/{len(items)} files")
+            with profiler.stage("save: export all") as span:
+                written = export_many(items, options, token=token)
+                span.output(written, sum(os.path.getsize(path) for path, error in written
+                                         if not error))
+                return written
+
+        def done(written):
+            errors = [f"{os.path.basename(path)}: {error}" for path, error in written
+                      if error is not None]
+            self.status_var.set(f"Exported {len(written) - len(errors)} results to {os.path.basename(out_dir)}")
+            if errors:
+                messagebox.showerror("Error", "Failed to export:\n" + "\n".join(errors[:10]))
+
+        def cancelled():
+            messagebox.showwarning("Export cancelled",
+                                   f"Export to {out_dir} was cancelled; files already written were kept.")
+            self.status_var.set("Export cancelled")
+
+        self.worker.submit(f"export:{out_dir}", f"Exporting {len(items)} results", job, done,
+                           self.processing_failed, cancelled)
+
+    def show_histogram(self, histogram):
+        """Show image histogram in a modern dialog, reusing the open one"""
+        try:
+            title = f"Image Histogram - {self.image_name}" if self.image_name else "Image Histogram"
+            with self.profiler.stage("histogram: draw"):
+                if self.histogram_windows is None:
+                    from histogram_window import HistogramWindowManager
+                    self.histogram_windows = HistogramWindowManager(self)
+                self.histogram_windows.show(histogram, title)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to create histogram: {str(e)}")
 
 if __name__ == "__main__":
     root = tk.Tk()
-    
-    # Set window icon (optional)
-    try:
-        root.iconbitmap("icon.ico")
-    except:
-        pass
-    
-    # Set theme
-    style = ttk.Style()
-    style.theme_use('clam')
-    
     app = ImageProcessorApp(root)
     root.mainloop()
\ No newline at end of file
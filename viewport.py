@@ -0,0 +1,46 @@
+"""Zoom and pan state of the canvases
+
+Kept apart from ``display`` so the GUI can create it without loading OpenCV.
+The pyramid arguments only need ``width``, ``height`` and ``fit_scale``.
+"""
+
+MIN_ZOOM = 1.0
+MAX_ZOOM = 32.0
+
+
+class Viewport:
+    """Zoom and pan state shared by the canvases"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.zoom = 1.0
+        self.center = (0.5, 0.5)
+
+    def _clamp(self):
+        self.zoom = min(max(self.zoom, MIN_ZOOM), MAX_ZOOM)
+        self.center = (min(max(self.center[0], 0.0), 1.0), min(max(self.center[1], 0.0), 1.0))
+        if self.zoom == MIN_ZOOM:
+            self.center = (0.5, 0.5)
+
+    def zoom_at(self, factor, point, view_size, pyramid):
+        """Zoom by ``factor`` keeping the image point under ``point`` (view pixels) fixed"""
+        scale = pyramid.fit_scale(view_size) * self.zoom
+        dx = (point[0] - view_size[0] / 2) / pyramid.width
+        dy = (point[1] - view_size[1] / 2) / pyramid.height
+        image_x = self.center[0] + dx / scale
+        image_y = self.center[1] + dy / scale
+
+        self.zoom *= factor
+        self._clamp()
+        new_scale = pyramid.fit_scale(view_size) * self.zoom
+        self.center = (image_x - dx / new_scale, image_y - dy / new_scale)
+        self._clamp()
+
+    def pan(self, dx, dy, view_size, pyramid):
+        """Move the view by ``dx``, ``dy`` view pixels"""
+        scale = pyramid.fit_scale(view_size) * self.zoom
+        self.center = (self.center[0] - dx / (scale * pyramid.width),
+                       self.center[1] - dy / (scale * pyramid.height))
+        self._clamp()
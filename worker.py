@@ -0,0 +1,153 @@
+"""Background execution of image jobs for the Tk GUI
+
+Jobs run on a thread pool; results are handed back to the Tk thread by a
+``root.after`` poll loop, so widgets are only ever touched from mainloop.
+Each channel (e.g. "process", "histogram") keeps at most one running and one
+queued job: a newer submission replaces the queued one and cancels the
+running one, whose result is then dropped instead of rendered. Jobs whose
+output must not vanish silently (saves, exports) get a channel of their own
+and an ``on_cancel`` callback.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when a newer request has superseded it"""
+
+
+class JobToken:
+    """Handle passed to a job for cancellation checks and progress reports"""
+
+    def __init__(self, label):
+        self.label = label
+        self.stage = ""
+        self.cancelled = False
+        self.started = None
+
+    def check(self, stage=None):
+        """Abort the job if it was cancelled; optionally record the current stage"""
+        if self.cancelled:
+            raise JobCancelled()
+        if stage is not None:
+            self.stage = stage
+
+
+class _Job:
+    def __init__(self, label, func, on_done, on_error, on_cancel):
+        self.token = JobToken(label)
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.future = None
+
+    def cancelled(self):
+        if self.on_cancel:
+            self.on_cancel()
+
+
+class BackgroundWorker:
+    """Run callables off the Tk thread with per-channel coalescing"""
+
+    def __init__(self, root, on_progress=None, max_workers=2, poll_ms=50):
+        self.root = root
+        self.on_progress = on_progress
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="image-worker")
+        self.running = {}
+        self.queued = {}
+        self._polling = False
+
+    def submit(self, channel, label, func, on_done, on_error=None, on_cancel=None):
+        """Schedule ``func(token)``; ``on_done(result)`` runs on the Tk thread
+
+        ``on_cancel()`` runs on the Tk thread instead when the job is
+        superseded or cancelled.
+        """
+        job = _Job(label, func, on_done, on_error, on_cancel)
+        current = self.running.get(channel)
+        if current is None:
+            self._start(channel, job)
+        else:
+            # Drop the stale request: the queued one never runs, the running one is discarded
+            current.token.cancelled = True
+            stale = self.queued.get(channel)
+            self.queued[channel] = job
+            if stale is not None:
+                stale.cancelled()
+        self._schedule_poll()
+
+    def cancel(self, channel=None):
+        """Cancel running and queued jobs of a channel (or of all channels)"""
+        channels = [channel] if channel else list(self.running)
+        for name in channels:
+            stale = self.queued.pop(name, None)
+            if stale is not None:
+                stale.cancelled()
+            job = self.running.get(name)
+            if job is not None:
+                job.token.cancelled = True
+
+    def channels(self):
+        """Names of the channels with a running job"""
+        return list(self.running)
+
+    def busy(self, channel=None):
+        """Whether a job is running on the channel (or on any channel)"""
+        if channel:
+            return channel in self.running
+        return bool(self.running)
+
+    def shutdown(self):
+        """Cancel everything and stop the worker threads
+
+        Running jobs are flagged without callbacks; a save already writing
+        finishes before the process exits.
+        """
+        self.queued.clear()
+        self.cancel()
+        self.executor.shutdown(wait=False)
+
+    def _start(self, channel, job):
+        job.token.started = time.perf_counter()
+        job.future = self.executor.submit(job.func, job.token)
+        self.running[channel] = job
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        for channel, job in list(self.running.items()):
+            if not job.future.done():
+                continue
+
+            del self.running[channel]
+            next_job = self.queued.pop(channel, None)
+            if next_job is not None:
+                self._start(channel, next_job)
+
+            if job.token.cancelled:
+                job.cancelled()
+                continue
+            try:
+                result = job.future.result()
+            except JobCancelled:
+                job.cancelled()
+                continue
+            except Exception as e:
+                if job.on_error:
+                    job.on_error(e)
+                continue
+            job.on_done(result)
+
+        if self.on_progress:
+            now = time.perf_counter()
+            self.on_progress([(job.token, now - job.token.started)
+                              for job in self.running.values()])
+        if self.running:
+            self._schedule_poll()